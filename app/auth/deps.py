@@ -1,38 +1,38 @@
-
 from fastapi import Request, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from jose import JWTError
-from app.db.session import SessionLocal
-from app.utils.security import decode_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import AsyncSessionLocal
 from app.models.user import User
+from app.auth.principal import get_token, get_principal
+from app.auth.user_cache import user_cache
+from app.llm.usage import current_user_id
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
-    token = request.cookies.get("ar_jwt")
-    if not token:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)) -> User:
+    if not get_token(request):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Não autenticado",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    try:
-        payload = decode_token(token)
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Token inválido")
-    except JWTError:
+    user_id = get_principal(request)
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Token inválido")
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    current_user_id.set(int(user_id))
+    user = user_cache.get(int(user_id))
+    if user is not None:
+        return user
+
+    user = await db.get(User, int(user_id))
     if user is None:
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
 
+    # desanexa da sessão: o commit da rota não expira o objeto que fica no cache
+    db.expunge(user)
+    user_cache.put(user)
     return user
@@ -0,0 +1,30 @@
+from fastapi import Request
+from jose import JWTError
+from app.utils.security import decode_token
+
+COOKIE_NAME = "ar_jwt"
+_UNSET = object()
+
+def get_token(request: Request) -> str | None:
+    auth = request.headers.get("Authorization")
+    if auth and auth.startswith("Bearer "):
+        return auth.split(" ", 1)[1]
+    return request.cookies.get(COOKIE_NAME)
+
+def get_principal(request: Request) -> str | None:
+    """`sub` do JWT da requisição (header Bearer ou cookie), ou None.
+    O token é decodificado uma única vez; o resultado fica em request.state
+    e é reaproveitado pelo middleware de auth, pelo rate limit e pelo get_current_user."""
+    cached = getattr(request.state, "principal", _UNSET)
+    if cached is not _UNSET:
+        return cached
+    principal = None
+    token = get_token(request)
+    if token:
+        try:
+            sub = decode_token(token).get("sub")
+            principal = str(sub) if sub is not None else None
+        except JWTError:
+            principal = None
+    request.state.principal = principal
+    return principal
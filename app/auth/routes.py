@@ -1,9 +1,10 @@
 
 from fastapi import APIRouter, Depends, Response
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.deps import get_db
 from app.schemas.auth import RegisterIn, LoginIn, TokenOut
 from app.auth.service import register_user, login_user
+from app.utils.security import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -19,15 +20,15 @@ def set_auth_cookie(response: Response, token: str):
     )
 
 @router.post("/register", response_model=TokenOut)
-def register(body: RegisterIn, db: Session = Depends(get_db), response: Response = None):
-    user = register_user(db, body.name, body.email, body.password)
-    token = login_user(db, user.email, body.password)
+async def register(body: RegisterIn, db: AsyncSession = Depends(get_db), response: Response = None):
+    user = await register_user(db, body.name, body.email, body.password)
+    token = create_access_token(str(user.id))
     set_auth_cookie(response, token)
     return TokenOut(access_token=token)
 
 @router.post("/login", response_model=TokenOut)
-def login(body: LoginIn, db: Session = Depends(get_db), response: Response = None):
-    token = login_user(db, body.email, body.password)
+async def login(body: LoginIn, db: AsyncSession = Depends(get_db), response: Response = None):
+    token = await login_user(db, body.email, body.password)
     set_auth_cookie(response, token)
     return TokenOut(access_token=token)
 
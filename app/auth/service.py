@@ -1,20 +1,20 @@
-
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.user import User
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.utils.security import hash_password_async, verify_password_async, create_access_token
 
-def register_user(db: Session, name: str, email: str, password: str) -> User:
-    if db.query(User).filter(User.email == email).first():
+async def register_user(db: AsyncSession, name: str, email: str, password: str) -> User:
+    if await db.scalar(select(User.id).where(User.email == email)):
         raise HTTPException(status_code=400, detail="Email já cadastrado")
-    user = User(name=name, email=email, password_hash=hash_password(password))
+    user = User(name=name, email=email, password_hash=await hash_password_async(password))
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def login_user(db: Session, email: str, password: str) -> str:
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+async def login_user(db: AsyncSession, email: str, password: str) -> str:
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user or not await verify_password_async(password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Credenciais inválidas")
     return create_access_token(str(user.id))
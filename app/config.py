@@ -6,14 +6,73 @@ class Settings(BaseSettings):
     app_env: str = Field("dev", alias="APP_ENV")
     secret_key: str = Field(default=None, alias="SECRET_KEY")
     access_token_expire_minutes: int = Field(120, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+    bcrypt_rounds: int = Field(12, alias="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(64, alias="PASSWORD_HASH_MAX_PENDING")
+    password_hash_retry_after_seconds: int = Field(2, alias="PASSWORD_HASH_RETRY_AFTER_SECONDS")
+    user_cache_ttl_seconds: float = Field(60.0, alias="USER_CACHE_TTL_SECONDS")
+    user_cache_max_entries: int = Field(10000, alias="USER_CACHE_MAX_ENTRIES")
     database_url: str = Field(default=None, alias="DATABASE_URL")
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, alias="DB_MAX_OVERFLOW")
+    sqlite_tuned: bool = Field(False, alias="SQLITE_TUNED")
+    sqlite_busy_timeout_ms: int = Field(15000, alias="SQLITE_BUSY_TIMEOUT_MS")
+    sqlite_mmap_mb: int = Field(256, alias="SQLITE_MMAP_MB")
+    sqlite_cache_mb: int = Field(64, alias="SQLITE_CACHE_MB")
+    write_behind: bool = Field(False, alias="WRITE_BEHIND")
+    write_batch_max: int = Field(200, alias="WRITE_BATCH_MAX")
+    write_batch_interval_ms: int = Field(50, alias="WRITE_BATCH_INTERVAL_MS")
+    usage_flush_seconds: float = Field(5.0, alias="USAGE_FLUSH_SECONDS")
+    usage_max_pending: int = Field(10000, alias="USAGE_MAX_PENDING")
+    metrics_token: str | None = Field(None, alias="METRICS_TOKEN")
 
     llm_provider: str = Field(default=None, alias="LLM_PROVIDER")
     openai_api_key: str | None = Field(default=None, alias="OPENAI_API_KEY")
     llm_model: str = Field(default=None, alias="LLM_MODEL")
+    openai_base_url: str | None = Field(default=None, alias="OPENAI_BASE_URL")
+    llm_timeout_seconds: float = Field(60.0, alias="LLM_TIMEOUT_SECONDS")
+    llm_max_retries: int = Field(2, alias="LLM_MAX_RETRIES")
+    llm_max_concurrency: int = Field(16, alias="LLM_MAX_CONCURRENCY")
+    llm_max_connections: int = Field(32, alias="LLM_MAX_CONNECTIONS")
+    llm_max_keepalive_connections: int = Field(16, alias="LLM_MAX_KEEPALIVE_CONNECTIONS")
+    llm_keepalive_seconds: float = Field(30.0, alias="LLM_KEEPALIVE_SECONDS")
+    llm_http2: bool = Field(False, alias="LLM_HTTP2")
+    llm_single_flight: bool = Field(True, alias="LLM_SINGLE_FLIGHT")
+    llm_cache_backend: str = Field("memory", alias="LLM_CACHE_BACKEND")
+    llm_cache_max_entries: int = Field(4096, alias="LLM_CACHE_MAX_ENTRIES")
+    llm_cache_ttl_seconds: float = Field(7 * 24 * 3600, alias="LLM_CACHE_TTL_SECONDS")
+    llm_cache_xfetch_beta: float = Field(1.0, alias="LLM_CACHE_XFETCH_BETA")
+    summary_section_chars: int = Field(12000, alias="SUMMARY_SECTION_CHARS")
+    summary_section_bullets: int = Field(5, alias="SUMMARY_SECTION_BULLETS")
+    summary_map_concurrency: int = Field(4, alias="SUMMARY_MAP_CONCURRENCY")
+    quiz_generation_timeout_seconds: float = Field(90.0, alias="QUIZ_GENERATION_TIMEOUT_SECONDS")
+
+    upload_max_request_mb: int = Field(50, alias="UPLOAD_MAX_REQUEST_MB")
+    extract_cache_dir: str = Field("./data/extract-cache", alias="EXTRACT_CACHE_DIR")
+    extract_cache_max_mb: int = Field(512, alias="EXTRACT_CACHE_MAX_MB")
+    pdf_workers: int = Field(2, alias="PDF_WORKERS")
+    pdf_pages_per_task: int = Field(20, alias="PDF_PAGES_PER_TASK")
+    pdf_extract_timeout_seconds: float = Field(60.0, alias="PDF_EXTRACT_TIMEOUT_SECONDS")
+
+    rag_chunk_tokens: int = Field(300, alias="RAG_CHUNK_TOKENS")
+    rag_chunk_overlap_tokens: int = Field(40, alias="RAG_CHUNK_OVERLAP_TOKENS")
+    rag_embed_batch: int = Field(64, alias="RAG_EMBED_BATCH")
+    rag_top_k: int = Field(4, alias="RAG_TOP_K")
+    rag_max_context_chars: int = Field(12000, alias="RAG_MAX_CONTEXT_CHARS")
+    vector_index_dir: str = Field("./data/vectors", alias="VECTOR_INDEX_DIR")
+
+    job_workers: int = Field(2, alias="JOB_WORKERS")
+    job_poll_seconds: float = Field(1.0, alias="JOB_POLL_SECONDS")
+    job_lease_seconds: int = Field(300, alias="JOB_LEASE_SECONDS")
+    job_max_attempts: int = Field(2, alias="JOB_MAX_ATTEMPTS")
+
+    page_size: int = Field(20, alias="PAGE_SIZE")
+    text_compression: str = Field("zlib", alias="TEXT_COMPRESSION")
 
     rate_limit_window_seconds: int = Field(60, alias="RATE_LIMIT_WINDOW_SECONDS")
     rate_limit_max_calls: int = Field(30, alias="RATE_LIMIT_MAX_CALLS")
+    rate_limit_backend: str = Field("memory", alias="RATE_LIMIT_BACKEND")
+    redis_url: str | None = Field(default=None, alias="REDIS_URL")
 
     class Config:
         env_file = ".env"
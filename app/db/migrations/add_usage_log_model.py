@@ -0,0 +1,23 @@
+"""Adiciona a coluna usage_logs.model em bancos criados antes dela.
+
+Uso: python -m app.db.migrations.add_usage_log_model
+
+Bancos novos já nascem com a coluna (create_all). Sem ela, a gravação dos
+registros de uso falha e é só registrada no log.
+"""
+from sqlalchemy import inspect, text
+from app.db.session import engine
+
+
+def migrate() -> None:
+    columns = {c["name"] for c in inspect(engine).get_columns("usage_logs")}
+    if "model" in columns:
+        print("usage_logs.model já existe")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE usage_logs ADD COLUMN model VARCHAR(80)"))
+    print("usage_logs.model adicionada")
+
+
+if __name__ == "__main__":
+    migrate()
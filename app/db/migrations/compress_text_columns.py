@@ -0,0 +1,82 @@
+"""Converte para CompressedText as colunas grandes já gravadas como texto.
+
+Uso: python -m app.db.migrations.compress_text_columns [--batch 200] [--vacuum]
+
+Pode rodar com a aplicação no ar: linhas ainda não convertidas continuam
+legíveis. No Postgres a coluna precisa virar bytea antes do deploy do novo
+modelo, e o script faz isso primeiro. No SQLite o arquivo só encolhe depois
+do VACUUM (--vacuum).
+"""
+import argparse
+from sqlalchemy import text
+from app.db.session import engine
+from app.db.types import compress_text, decompress_text, is_compressed
+
+COLUMNS = [
+    ("tutor_documents", "content"),
+    ("study_plans", "plan_md"),
+    ("quizzes", "items_json"),
+]
+
+
+def _to_bytea(conn, table: str, column: str) -> None:
+    kind = conn.execute(
+        text("SELECT data_type FROM information_schema.columns WHERE table_name = :t AND column_name = :c"),
+        {"t": table, "c": column},
+    ).scalar()
+    if kind and kind != "bytea":
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea USING convert_to({column}, 'UTF8')"))
+        print(f"{table}.{column}: {kind} -> bytea")
+
+
+def _convert(table: str, column: str, batch: int) -> tuple[int, int, int]:
+    rows = before = after = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            chunk = conn.execute(
+                text(f"SELECT id, {column} FROM {table} WHERE id > :last ORDER BY id LIMIT :n"),
+                {"last": last_id, "n": batch},
+            ).all()
+            if not chunk:
+                break
+            for row_id, value in chunk:
+                if value is None or is_compressed(value):
+                    continue
+                plain = decompress_text(value)
+                packed = compress_text(plain)
+                conn.execute(text(f"UPDATE {table} SET {column} = :v WHERE id = :id"), {"v": packed, "id": row_id})
+                rows += 1
+                before += len(plain.encode("utf-8"))
+                after += len(packed)
+            last_id = chunk[-1][0]
+    return rows, before, after
+
+
+def migrate(batch: int = 200, vacuum: bool = False) -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for table, column in COLUMNS:
+                _to_bytea(conn, table, column)
+
+    for table, column in COLUMNS:
+        rows, before, after = _convert(table, column, batch)
+        ratio = before / after if after else 0
+        print(f"{table}.{column}: {rows} linhas, {before} -> {after} bytes ({ratio:.1f}x)")
+
+    if vacuum and engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+        print("VACUUM concluído")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--vacuum", action="store_true")
+    args = ap.parse_args()
+    migrate(args.batch, args.vacuum)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.metrics.registry import instrument_pool
 import os
 
-class Base(DeclarativeBase):
+class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 url = settings.database_url or os.getenv("DATABASE_URL", "sqlite:///./app.db")
@@ -14,14 +17,48 @@ elif url.startswith("postgresql://"):
     url = url.replace("postgresql://", "postgresql+psycopg://", 1)
 
 connect_args = {}
-if url.startswith("sqlite"):
+pool_args = {}
+async_pool_args = {}
+is_sqlite = url.startswith("sqlite")
+if is_sqlite:
     connect_args = {"check_same_thread": False}
+    async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if settings.sqlite_tuned and ":memory:" not in url:
+        # o aiosqlite abre uma conexão (e uma thread) por sessão por padrão
+        async_pool_args = {"poolclass": AsyncAdaptedQueuePool, "pool_size": settings.db_pool_size,
+                           "max_overflow": settings.db_max_overflow}
+else:
+    # psycopg 3 tem driver síncrono e assíncrono com o mesmo nome de dialeto
+    pool_args = {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+    async_pool_args = pool_args
+    async_url = url
+
+def sqlite_pragmas() -> list[str]:
+    """Perfil de produção do SQLite: WAL deixa leitores e um escritor trabalharem
+    juntos e busy_timeout espera o lock em vez de falhar com "database is locked"."""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_mb * 1024 * 1024}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_mb * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def tune_sqlite(sync_engine) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for pragma in sqlite_pragmas():
+            cur.execute(pragma)
+        cur.close()
 
 engine = create_engine(
     url,
     connect_args=connect_args,
     pool_pre_ping=True,
     future=True,
+    **pool_args,
 )
 
 SessionLocal = sessionmaker(
@@ -31,8 +68,30 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+# Rotas e jobs usam a sessão assíncrona; a síncrona fica para init_db e scripts.
+async_engine = create_async_engine(
+    async_url,
+    connect_args=connect_args,
+    pool_pre_ping=True,
+    **async_pool_args,
+)
+
+if is_sqlite and settings.sqlite_tuned:
+    tune_sqlite(engine)
+    tune_sqlite(async_engine.sync_engine)
+
+instrument_pool(engine.pool, "sync")
+instrument_pool(async_engine.sync_engine.pool, "async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def init_db():
-    from app.models import user, document, usage_log, tutor
+    from app.models import user, document, usage_log, tutor, job
     Base.metadata.create_all(bind=engine)
 
 import app.models.tutor
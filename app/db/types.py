@@ -0,0 +1,81 @@
+"""Tipos de coluna próprios.
+
+CompressedText guarda texto comprimido em binário com um cabeçalho de 4 bytes:
+    b"CT" + versão (1 byte) + codec (1 byte: r=cru, z=zlib, s=zstd)
+Valores antigos (str ou bytes sem cabeçalho) continuam legíveis, então a
+migração pode rodar com a aplicação no ar.
+"""
+import zlib
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from app.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd é opcional; sem ele usamos zlib
+    zstandard = None
+
+MAGIC = b"CT"
+VERSION = 1
+RAW, ZLIB, ZSTD = b"r", b"z", b"s"
+MIN_COMPRESS_BYTES = 256
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+
+def _codec() -> bytes:
+    kind = settings.text_compression.lower()
+    if kind == "zstd" and zstandard is not None:
+        return ZSTD
+    if kind == "none":
+        return RAW
+    return ZLIB
+
+
+def compress_text(value: str, codec: bytes | None = None) -> bytes:
+    data = value.encode("utf-8")
+    codec = codec or _codec()
+    if len(data) < MIN_COMPRESS_BYTES:
+        codec = RAW
+    if codec == ZSTD:
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    elif codec == ZLIB:
+        data = zlib.compress(data, ZLIB_LEVEL)
+    return MAGIC + bytes([VERSION]) + codec + data
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:3]) == MAGIC + bytes([VERSION])
+
+
+def decompress_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not is_compressed(value):
+        return value.decode("utf-8")
+    codec, data = value[3:4], value[4:]
+    if codec == ZLIB:
+        data = zlib.decompress(data)
+    elif codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Valor comprimido com zstd, mas o pacote zstandard não está instalado.")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif codec != RAW:
+        raise ValueError(f"Codec desconhecido em CompressedText: {codec!r}")
+    return data.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """Texto guardado comprimido; para o ORM continua sendo str."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -0,0 +1,143 @@
+"""Escritor único com lotes para gravações que não precisam ser lidas de volta
+na mesma requisição (tentativas de prova, logs de uso).
+
+Cada trabalho é uma função `async (db) -> None` que só adiciona/atualiza; o
+escritor junta vários numa transação. Com WRITE_BEHIND desligado, `write()`
+executa e faz commit na sessão da própria requisição.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+
+log = logging.getLogger(__name__)
+
+Work = Callable[[AsyncSession], Awaitable[None]]
+OnError = Callable[[], None]
+
+
+class BatchWriter:
+    def __init__(self, sessionmaker: async_sessionmaker, max_batch: int, interval_seconds: float):
+        self.sessionmaker = sessionmaker
+        self.max_batch = max_batch
+        self.interval = interval_seconds
+        self._queue: asyncio.Queue[tuple[Work, OnError | None] | None] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Grava o que ainda estiver na fila e encerra o laço."""
+        if self._task is not None:
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, work: Work, on_error: OnError | None = None) -> None:
+        """Enfileira `work`. Levanta RuntimeError se o laço não está rodando,
+        em vez de deixar a gravação numa fila que ninguém lê. `on_error` é
+        chamado se a gravação acabar descartada."""
+        if not self.alive:
+            raise RuntimeError("escritor em segundo plano não está rodando")
+        self._queue.put_nowait((work, on_error))
+
+    def _drain(self, batch: list[tuple[Work, OnError | None]]) -> list[tuple[Work, OnError | None]]:
+        while len(batch) < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is None:
+                self._closed = True
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _discarded(on_error: OnError | None) -> None:
+        if on_error is not None:
+            try:
+                on_error()
+            except Exception:
+                log.exception("falha no tratamento de gravação descartada")
+
+    async def _loop(self) -> None:
+        while not self._closed:
+            item = await self._queue.get()
+            if item is None:
+                break
+            # espera um pouco para juntar mais gravações na mesma transação
+            if self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.interval)
+            batch = self._drain([item])
+            try:
+                await self._flush(batch)
+            except Exception:
+                # ex.: falha ao abrir a sessão ou no rollback; o laço não pode morrer
+                self.failed += len(batch)
+                log.exception("lote de %d gravações perdido", len(batch))
+                for _, on_error in batch:
+                    self._discarded(on_error)
+
+    async def _flush(self, batch: list[tuple[Work, OnError | None]]) -> None:
+        if not batch:
+            return
+        async with self.sessionmaker() as db:
+            try:
+                for work, _ in batch:
+                    await work(db)
+                await db.commit()
+                self.batches += 1
+                self.written += len(batch)
+                return
+            except Exception:
+                await db.rollback()
+                log.exception("lote de %d gravações falhou; tentando uma a uma", len(batch))
+            # isola o item com problema para não perder o lote inteiro
+            for work, on_error in batch:
+                try:
+                    await work(db)
+                    await db.commit()
+                    self.written += 1
+                except Exception:
+                    await db.rollback()
+                    self.failed += 1
+                    log.exception("gravação descartada")
+                    self._discarded(on_error)
+
+
+writer: BatchWriter | None = None
+
+
+async def write(db: AsyncSession, work: Work) -> None:
+    """Enfileira `work` no escritor único ou, sem ele (ou se ele parou), grava já na sessão `db`."""
+    if writer is not None and writer.alive:
+        writer.submit(work)
+        return
+    if writer is not None:
+        log.error("escritor em segundo plano parado; gravando direto na requisição")
+    await work(db)
+    await db.commit()
+
+
+def start_writer() -> None:
+    global writer
+    if not settings.write_behind:
+        return
+    writer = BatchWriter(AsyncSessionLocal, settings.write_batch_max, settings.write_batch_interval_ms / 1000)
+    writer.start()
+
+
+async def stop_writer() -> None:
+    global writer
+    if writer is not None:
+        w, writer = writer, None
+        await w.stop()
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.job import Job
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+STALE_GRACE_SECONDS = 30
+
+async def enqueue(db: AsyncSession, owner_id: int, kind: str, payload: dict, document_id: int | None = None) -> Job:
+    job = Job(owner_id=owner_id, document_id=document_id, kind=kind, status=QUEUED,
+              payload_json=json.dumps(payload, ensure_ascii=False))
+    db.add(job); await db.commit(); await db.refresh(job)
+    return job
+
+async def claim_next(db: AsyncSession, worker_id: str) -> Job | None:
+    """Reserva o job mais antigo da fila. O UPDATE condicional garante que só um
+    worker (de qualquer processo) fique com cada job."""
+    while True:
+        job_id = await db.scalar(
+            select(Job.id)
+            .where(Job.status == QUEUED)
+            .order_by(Job.id)
+            .limit(1)
+        )
+        if job_id is None:
+            return None
+        res = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, locked_by=worker_id, started_at=datetime.utcnow(),
+                    attempts=Job.attempts + 1)
+        )
+        await db.commit()
+        if res.rowcount == 1:
+            return await db.get(Job, job_id)
+
+async def finish(db: AsyncSession, job_id: int, result_url: str) -> None:
+    await db.execute(update(Job).where(Job.id == job_id)
+                     .values(status=DONE, result_url=result_url, error=None, finished_at=datetime.utcnow()))
+    await db.commit()
+
+async def fail(db: AsyncSession, job_id: int, error: str) -> None:
+    """Devolve o job para a fila enquanto houver tentativas; depois marca como falho."""
+    job = await db.get(Job, job_id, populate_existing=True)
+    if job is None:
+        return
+    job.error = error[:2000]
+    job.locked_by = None
+    if job.attempts < settings.job_max_attempts:
+        job.status = QUEUED
+    else:
+        job.status = FAILED
+        job.finished_at = datetime.utcnow()
+    await db.commit()
+
+async def release(db: AsyncSession, job_id: int) -> None:
+    """Devolve à fila um job interrompido pelo desligamento do worker, sem gastar tentativa."""
+    await db.execute(update(Job).where(Job.id == job_id, Job.status == RUNNING)
+                     .values(status=QUEUED, locked_by=None, attempts=Job.attempts - 1))
+    await db.commit()
+
+async def requeue_stale(db: AsyncSession) -> int:
+    """Recupera jobs 'running' abandonados (processo que caiu ou reiniciou no meio).
+    Um job vivo nunca passa de JOB_LEASE_SECONDS (o worker o interrompe); a folga
+    cobre o tempo de gravar a falha. A execução abandonada já contou como
+    tentativa no claim: sem tentativas sobrando, o job é marcado como falho, para
+    que um job que derruba o worker não fique voltando à fila para sempre."""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.job_lease_seconds + STALE_GRACE_SECONDS)
+    stale = (Job.status == RUNNING) & (Job.started_at < cutoff)
+    failed = await db.execute(
+        update(Job)
+        .where(stale, Job.attempts >= settings.job_max_attempts)
+        .values(status=FAILED, locked_by=None, finished_at=datetime.utcnow(),
+                error="worker interrompido durante a execução; tentativas esgotadas")
+    )
+    requeued = await db.execute(
+        update(Job)
+        .where(stale)
+        .values(status=QUEUED, locked_by=None)
+    )
+    await db.commit()
+    return failed.rowcount + requeued.rowcount
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth.deps import get_db, get_current_user
+from app.models.job import Job
+from app.models.user import User
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+templates = Jinja2Templates(directory="app/web/templates")
+
+KIND_LABELS = {"study_plan": "Plano de estudo", "quiz": "Prova"}
+
+async def _get_job_user_safe(db: AsyncSession, user_id: int, job_id: int) -> Job | None:
+    return await db.scalar(select(Job).where(Job.id == job_id, Job.owner_id == user_id))
+
+@router.get("/{job_id}", response_class=HTMLResponse)
+async def job_page(request: Request, job_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    job = await _get_job_user_safe(db, user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return templates.TemplateResponse(
+        "jobs/status.html",
+        {"request": request, "job": job, "kind_label": KIND_LABELS.get(job.kind, job.kind)},
+    )
+
+@router.get("/{job_id}/status")
+async def job_status(job_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    job = await _get_job_user_safe(db, user.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return {"id": job.id, "status": job.status, "result_url": job.result_url, "error": job.error}
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.jobs import queue
+from app.llm.usage import current_user_id
+from app.models.job import Job
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[AsyncSession, Job, dict], Awaitable[str]]
+HANDLERS: dict[str, Handler] = {}
+
+def handler(kind: str):
+    """Registra a função que executa jobs do tipo `kind` e devolve a URL do resultado."""
+    def deco(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return deco
+
+class JobWorkerPool:
+    def __init__(self, size: int, poll_seconds: float):
+        self.size = size
+        self.poll_seconds = poll_seconds
+        self.worker_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        await self._requeue_stale()
+        self._tasks = [asyncio.create_task(self._loop(f"{self.worker_prefix}-{i}")) for i in range(self.size)]
+        self._tasks.append(asyncio.create_task(self._reaper()))
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _requeue_stale(self) -> None:
+        async with AsyncSessionLocal() as db:
+            n = await queue.requeue_stale(db)
+            if n:
+                log.info("%d job(s) abandonados recuperados", n)
+
+    async def _reaper(self) -> None:
+        """Recupera periodicamente jobs de workers que caíram (deste ou de outro processo)."""
+        interval = max(self.poll_seconds, settings.job_lease_seconds / 4)
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                break
+            try:
+                await self._requeue_stale()
+            except Exception:
+                log.exception("falha ao recuperar jobs abandonados")
+
+    async def _claim(self, worker_id: str) -> int | None:
+        async with AsyncSessionLocal() as db:
+            job = await queue.claim_next(db, worker_id)
+            return job.id if job else None
+
+    async def _loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = await self._claim(worker_id)
+            except Exception:
+                log.exception("falha ao buscar job")
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job_id)
+
+    async def _run(self, job_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(Job, job_id)
+            kind = job.kind
+            current_user_id.set(job.owner_id)
+            fn = HANDLERS.get(kind)
+            if fn is None:
+                await queue.fail(db, job_id, f"tipo de job desconhecido: {kind}")
+                return
+            try:
+                result_url = await asyncio.wait_for(
+                    fn(db, job, json.loads(job.payload_json or "{}")),
+                    timeout=settings.job_lease_seconds,
+                )
+            except asyncio.CancelledError:
+                await db.rollback()
+                await queue.release(db, job_id)
+                raise
+            except Exception as e:
+                log.exception("job %s (%s) falhou", job_id, kind)
+                await db.rollback()
+                await queue.fail(db, job_id, f"{type(e).__name__}: {e}")
+                return
+            await queue.finish(db, job_id, result_url)
+
+pool: JobWorkerPool | None = None
+
+async def start_pool() -> None:
+    global pool
+    if settings.job_workers <= 0:
+        return
+    import app.tutor.jobs  # registra os handlers
+    pool = JobWorkerPool(settings.job_workers, settings.job_poll_seconds)
+    await pool.start()
+
+async def stop_pool() -> None:
+    global pool
+    if pool is not None:
+        await pool.stop()
+        pool = None
@@ -0,0 +1,142 @@
+"""Cache de resultados determinísticos do LLM (resumos, correções com temperatura 0).
+
+Duas camadas: um LRU em memória, limitado em entradas, na frente de um Redis
+opcional (LLM_CACHE_BACKEND=redis + REDIS_URL) compartilhado entre workers e
+que sobrevive a reinícios. As duas usam o mesmo TTL.
+
+Contra estouro de manada na expiração, a leitura aplica a renovação antecipada
+probabilística (XFetch): perto do fim do TTL, cada leitura tem uma chance
+crescente de devolver miss e recomputar antes de a entrada sumir para todos.
+A chance cresce com o tempo que o valor levou para ser calculado. Os valores
+precisam ser serializáveis em JSON.
+"""
+import json
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any
+from app.config import settings
+from app.metrics.registry import LLM_CACHE_REQUESTS
+
+log = logging.getLogger(__name__)
+
+
+class LLMCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, beta: float = 1.0, redis=None, prefix: str = "llm:"):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.beta = beta
+        self.redis = redis
+        self.prefix = prefix
+        # chave -> (valor, segundos para calcular, expira em [epoch])
+        self._data: OrderedDict[str, tuple[Any, float, float]] = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.early = 0
+
+    def _fresh(self, delta: float, expires: float) -> bool:
+        """XFetch: falso se expirou ou se a leitura foi sorteada para renovar antes."""
+        return time.time() - delta * self.beta * math.log(1.0 - random.random()) < expires
+
+    def _count(self, namespace: str, result: str) -> None:
+        LLM_CACHE_REQUESTS.labels(namespace, result).inc()
+
+    def _put_local(self, key: str, entry: tuple[Any, float, float]) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, namespace: str, key: str) -> Any | None:
+        """Devolve o valor em cache ou None (miss, expirado ou renovação antecipada)."""
+        key = f"{namespace}:{key}"
+        early = False
+        local_expires = 0.0
+        entry = self._data.get(key)
+        if entry is not None:
+            value, delta, local_expires = entry
+            if self._fresh(delta, local_expires):
+                self._data.move_to_end(key)
+                self.hits += 1
+                self._count(namespace, "hit")
+                return value
+            early = local_expires > time.time()
+            if not early:
+                del self._data[key]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.prefix + key)
+                stored = json.loads(raw) if raw is not None else None
+            except Exception:
+                log.warning("cache do LLM: Redis indisponível, seguindo sem ele", exc_info=True)
+                stored = None
+            # só vale se for mais nova que a local (outro worker já renovou)
+            if stored is not None and stored["e"] > local_expires:
+                entry = (stored["v"], stored["d"], stored["e"])
+                if self._fresh(entry[1], entry[2]):
+                    self._put_local(key, entry)
+                    self.redis_hits += 1
+                    self._count(namespace, "redis_hit")
+                    return entry[0]
+                early = early or entry[2] > time.time()
+
+        if early:
+            self.early += 1
+            self._count(namespace, "early_refresh")
+        else:
+            self.misses += 1
+            self._count(namespace, "miss")
+        return None
+
+    async def set(self, namespace: str, key: str, value: Any, compute_seconds: float) -> None:
+        """Guarda `value`; `compute_seconds` é quanto custou calculá-lo (usado pelo XFetch)."""
+        key = f"{namespace}:{key}"
+        entry = (value, compute_seconds, time.time() + self.ttl)
+        self._put_local(key, entry)
+        if self.redis is None:
+            return
+        payload = json.dumps({"v": value, "d": compute_seconds, "e": entry[2]}, ensure_ascii=False)
+        try:
+            await self.redis.set(self.prefix + key, payload, px=int(self.ttl * 1000))
+        except Exception:
+            log.warning("cache do LLM: falha ao gravar no Redis", exc_info=True)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses + self.early
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "early_refreshes": self.early,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "backend": "redis" if self.redis is not None else "memory",
+        }
+
+    async def aclose(self) -> None:
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+def make_cache(kind: str, redis_url: str | None = None) -> LLMCache:
+    redis = None
+    if kind == "redis":
+        if not redis_url:
+            raise ValueError("LLM_CACHE_BACKEND=redis exige REDIS_URL")
+        from redis.asyncio import Redis
+        redis = Redis.from_url(redis_url)
+    elif kind != "memory":
+        raise ValueError(f"LLM_CACHE_BACKEND desconhecido: {kind}")
+    return LLMCache(settings.llm_cache_max_entries, settings.llm_cache_ttl_seconds,
+                    beta=settings.llm_cache_xfetch_beta, redis=redis)
+
+
+llm_cache = make_cache(settings.llm_cache_backend, settings.redis_url)
@@ -1,44 +1,89 @@
 import os
-from typing import Sequence, List
-from app.config import settings
 import re
+import asyncio
 import hashlib
-from typing import List
-try:
-    from openai import OpenAI
-    _HAS_NEW = True
-except Exception:
-    OpenAI = None
-    _HAS_NEW = False
-
-try:
-    import openai as _legacy 
-    _HAS_LEGACY = True
-except Exception:
-    _legacy = None 
-    _HAS_LEGACY = False
+import time
+import zlib
+import importlib.util
+from typing import Sequence, List, Tuple
+import httpx
+from openai import AsyncOpenAI
+from app.config import settings
+from app.llm import usage
+from app.llm.cache import llm_cache
+from app.llm.singleflight import SingleFlight
+from app.metrics.registry import LLM_COALESCED, observe_llm
 
 CHAT_MODEL = getattr(settings, "llm_model", None) or os.getenv("OPENAI_CHAT_MODEL", "gpt-4.1-mini")
 EMBED_MODEL = "text-embedding-3-small"
-SUMMARY_CACHE = {}
 MAX_INPUT_CHARS = 25000
+SUMMARY_INSTRUCTION = "Resuma o texto abaixo em exatamente {bullets} itens curtos."
+SECTION_INSTRUCTION = "Resuma este trecho de um documento maior em até {bullets} itens curtos."
+REDUCE_INSTRUCTION = (
+    "O texto abaixo reúne resumos parciais, em ordem, das seções de um documento. "
+    "Consolide-os em exatamente {bullets} itens curtos que cubram o documento inteiro, sem repetições."
+)
 
-def _hash_payload(text: str, bullets: int) -> str:
+_http: httpx.AsyncClient | None = None
+_client: AsyncOpenAI | None = None
+_slots: asyncio.Semaphore | None = None
+_flight = SingleFlight()
+
+def _flight_key(*parts) -> str:
     h = hashlib.sha256()
-    h.update(str(bullets).encode("utf-8"))
-    h.update(text.encode("utf-8"))
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
     return h.hexdigest()
 
+async def _coalesced(function: str, key: str, fn):
+    """Junta chamadas idênticas em voo numa só ida ao provedor (LLM_SINGLE_FLIGHT)."""
+    if not settings.llm_single_flight:
+        return await fn()
+    if key in _flight:
+        LLM_COALESCED.labels(function).inc()
+    return await _flight.do(key, fn)
+
 def _api_key():
     """Retorna a OPENAI_API_KEY a partir de settings/.env."""
     return getattr(settings, "openai_api_key", None) or os.getenv("OPENAI_API_KEY")
 
-def _client_new():
-    """Instancia OpenAI (SDK 1.x)."""
-    if not _HAS_NEW:
-        raise RuntimeError("SDK openai>=1.x não disponível.")
-    key = _api_key()
-    return OpenAI(api_key=key) if key else OpenAI()
+def _get_client() -> AsyncOpenAI:
+    """Cliente assíncrono único, com pool de conexões keep-alive reaproveitado entre chamadas."""
+    global _http, _client
+    if _client is None:
+        http2 = settings.llm_http2 and importlib.util.find_spec("h2") is not None
+        _http = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.llm_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_seconds,
+            ),
+        )
+        _client = AsyncOpenAI(
+            api_key=_api_key(),
+            base_url=settings.openai_base_url,
+            http_client=_http,
+            max_retries=settings.llm_max_retries,
+        )
+    return _client
+
+def _get_slots() -> asyncio.Semaphore:
+    """Limita quantas chamadas ao provedor ficam em voo ao mesmo tempo."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.llm_max_concurrency)
+    return _slots
+
+async def aclose() -> None:
+    """Fecha o pool HTTP e o Redis do cache (chamado no shutdown da aplicação)."""
+    global _http, _client, _slots
+    if _http is not None:
+        await _http.aclose()
+    await llm_cache.aclose()
+    _http, _client, _slots = None, None, None
 
 def _naive_summary(text: str, n: int = 5) -> List[str]:
     """Fallback: pega as N primeiras sentenças distintas."""
@@ -53,82 +98,101 @@ def _naive_summary(text: str, n: int = 5) -> List[str]:
             break
     return cleaned or ["(sem conteúdo)"]
 
-def chat(system: str, user: str, temperature: float = 0.2) -> str:
+async def chat(system: str, user: str, temperature: float = 0.2) -> str:
     """Executa chat no modelo configurado e retorna apenas o texto.
-    Comentários em PT-BR: função principal para prompts do app."""
-    if _HAS_NEW:
-        c = _client_new()
-        if hasattr(c, "chat") and hasattr(c.chat, "completions"):
-            r = c.chat.completions.create(
-                model=CHAT_MODEL,
-                messages=[{"role":"system","content":system},
-                          {"role":"user","content":user}],
-                temperature=temperature,
-            )
-            return (r.choices[0].message.content or "").strip()
-        if hasattr(c, "responses"):
-            r = c.responses.create(
-                model=CHAT_MODEL,
-                input=[{"role":"system","content":system},
-                       {"role":"user","content":user}],
-                temperature=temperature,
-            )
-            return getattr(r, "output_text", "").strip()
-        raise RuntimeError("SDK 1.x encontrado, mas sem chat.completions/responses.")
-
-    if not _HAS_LEGACY:
-        raise RuntimeError("Nenhum SDK OpenAI disponível. Instale conforme requirements.")
-    _legacy.api_key = _api_key()
-    r = _legacy.ChatCompletion.create(
-        model=CHAT_MODEL or "gpt-3.5-turbo",
-        messages=[{"role":"system","content":system},
-                  {"role":"user","content":user}],
-        temperature=temperature,
-    )
-    return r["choices"][0]["message"]["content"].strip()
+    Comentários em PT-BR: função principal para prompts do app.
+    Chamadas idênticas simultâneas compartilham a mesma resposta; com
+    temperatura 0 a saída é determinística e fica no cache."""
+    key = _flight_key("chat", CHAT_MODEL, temperature, system, user)
+    if temperature != 0:
+        return await _coalesced("chat", key, lambda: _chat_once(system, user, temperature))
+    cached = await llm_cache.get("chat", key)
+    if cached is not None:
+        return cached
+    t0 = time.perf_counter()
+    out = await _coalesced("chat", key, lambda: _chat_once(system, user, temperature))
+    if out:
+        await llm_cache.set("chat", key, out, time.perf_counter() - t0)
+    return out
 
-def embed(texts: Sequence[str]) -> List[List[float]]:
+@observe_llm("chat")
+async def _chat_once(system: str, user: str, temperature: float) -> str:
+    c = _get_client()
+    async with _get_slots():
+        t0 = time.perf_counter()
+        r = await c.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role":"system","content":system},
+                      {"role":"user","content":user}],
+            temperature=temperature,
+        )
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+    u = r.usage
+    usage.record("/chat/completions", r.model or CHAT_MODEL,
+                 u.prompt_tokens if u else 0, u.completion_tokens if u else 0, latency_ms)
+    return (r.choices[0].message.content or "").strip()
+
+async def embed(texts: Sequence[str]) -> List[List[float]]:
     """Gera embeddings para uma sequência de textos."""
-    if _HAS_NEW:
-        c = _client_new()
-        r = c.embeddings.create(model=EMBED_MODEL, input=list(texts))
-        return [d.embedding for d in r.data]
-    if not _HAS_LEGACY:
-        raise RuntimeError("Nenhum SDK OpenAI disponível para embeddings.")
-    _legacy.api_key = _api_key()
-    r = _legacy.Embedding.create(model=EMBED_MODEL, input=list(texts))
-    return [d["embedding"] for d in r["data"]]
-
-def summarize_to_bullets(text: str, bullets: int = 10) -> List[str]:
-    """
-    Gera um resumo em 'bullets' itens usando o LLM (via chat()), com fallback.
-    Retorna uma lista de strings (cada item = 1 bullet).
-    """
-    text = (text or "").strip()
-    if not text:
-        return ["(sem conteúdo)"]
+    texts = list(texts)
+    key = _flight_key("embed", EMBED_MODEL, *texts)
+    return await _coalesced("embed", key, lambda: _embed_once(texts))
 
-    if len(text) > MAX_INPUT_CHARS:
-        text = text[:MAX_INPUT_CHARS]
+@observe_llm("embed")
+async def _embed_once(texts: List[str]) -> List[List[float]]:
+    c = _get_client()
+    async with _get_slots():
+        t0 = time.perf_counter()
+        r = await c.embeddings.create(model=EMBED_MODEL, input=texts)
+        latency_ms = int((time.perf_counter() - t0) * 1000)
+    usage.record("/embeddings", r.model or EMBED_MODEL,
+                 r.usage.prompt_tokens if r.usage else 0, 0, latency_ms)
+    return [d.embedding for d in r.data]
 
-    cache_key = _hash_payload(text, bullets)
-    if cache_key in SUMMARY_CACHE:
-        return SUMMARY_CACHE[cache_key]
+SUMMARY_SYSTEM = (
+    "Você é um assistente de estudo conciso. "
+    "Resuma o texto solicitado em tópicos claros e objetivos (bullet points). "
+    "Escreva em português do Brasil."
+)
+
+def _split_sections(text: str, target: int) -> List[str]:
+    """Divide o texto em seções de ~target caracteres, sempre em fim de frase.
+    As fronteiras dependem do conteúdo (hash da frase), não da posição: uma edição
+    pequena altera só a seção onde caiu, e as seguintes continuam idênticas."""
+    sents = re.split(r'(?<=[.!?])\s+', text)
+    sections, cur, size = [], [], 0
+    for sent in sents:
+        while len(sent) > target:
+            if cur:
+                sections.append(" ".join(cur)); cur, size = [], 0
+            sections.append(sent[:target]); sent = sent[target:]
+        if size + len(sent) > target and cur:
+            sections.append(" ".join(cur)); cur, size = [], 0
+        cur.append(sent); size += len(sent) + 1
+        if size >= target // 2 and zlib.crc32(sent.encode("utf-8")) % 8 == 0:
+            sections.append(" ".join(cur)); cur, size = [], 0
+    if cur:
+        sections.append(" ".join(cur))
+    return [s for s in sections if s.strip()]
+
+async def _summarize_once(text: str, bullets: int, instruction: str) -> Tuple[List[str], bool]:
+    """Uma chamada ao LLM para um texto que cabe em MAX_INPUT_CHARS (com cache por conteúdo).
+    Devolve (bullets, degradado); degradado = veio do fallback sem LLM."""
+    cache_key = _flight_key(CHAT_MODEL, bullets, instruction, text)
+    cached = await llm_cache.get("summary", cache_key)
+    if cached is not None:
+        return cached, False
+    t0 = time.perf_counter()
 
-    system = (
-        "Você é um assistente de estudo conciso. "
-        "Resuma o texto solicitado em tópicos claros e objetivos (bullet points). "
-        "Escreva em português do Brasil."
-    )
     user_prompt = (
-        f"Resuma o texto abaixo em exatamente {bullets} itens curtos. "
+        f"{instruction.format(bullets=bullets)} "
         "Foque em conceitos, definições e relações importantes. "
         "Responda somente com bullets (uma linha por bullet), sem parágrafos extras.\n\n"
         f"TEXTO:\n{text}"
     )
 
     try:
-        content = chat(system=system, user=user_prompt, temperature=0.2)
+        content = await chat(system=SUMMARY_SYSTEM, user=user_prompt, temperature=0.2)
         lines = [l.strip() for l in content.splitlines() if l.strip()]
         out = []
         for l in lines:
@@ -137,10 +201,49 @@ def summarize_to_bullets(text: str, bullets: int = 10) -> List[str]:
                 out.append(l)
             if len(out) >= bullets:
                 break
-        if not out:
-            out = _naive_summary(text, bullets)
     except Exception:
-        out = _naive_summary(text, bullets)
+        out = []
+    if not out:
+        # fallback não entra no cache: a próxima chamada tenta o LLM de novo
+        return _naive_summary(text, bullets), True
+
+    await llm_cache.set("summary", cache_key, out, time.perf_counter() - t0)
+    return out, False
+
+@observe_llm("summarize_to_bullets")
+async def summarize(text: str, bullets: int = 10) -> Tuple[List[str], bool]:
+    """
+    Gera um resumo em 'bullets' itens usando o LLM (via chat()), com fallback.
+    Textos maiores que MAX_INPUT_CHARS são resumidos em map-reduce: cada seção
+    vira alguns bullets (em paralelo, com cache por seção) e esses bullets
+    parciais são consolidados nos N finais.
+    Retorna (bullets, degradado): degradado indica que alguma parte caiu no
+    fallback sem LLM, e o resultado não deve ser guardado como definitivo.
+    """
+    text = (text or "").strip()
+    if not text:
+        return ["(sem conteúdo)"], False
+
+    if len(text) <= MAX_INPUT_CHARS:
+        return await _summarize_once(text, bullets, SUMMARY_INSTRUCTION)
+
+    sections = _split_sections(text, settings.summary_section_chars)
+    slots = asyncio.Semaphore(settings.summary_map_concurrency)
+
+    async def _map(section: str) -> Tuple[List[str], bool]:
+        async with slots:
+            return await _summarize_once(section, settings.summary_section_bullets, SECTION_INSTRUCTION)
+
+    partials = await asyncio.gather(*(_map(sec) for sec in sections))
+    degraded = any(d for _, d in partials)
+    merged = "\n".join(f"- {b}" for part, _ in partials for b in part)
+    if len(merged) > MAX_INPUT_CHARS:
+        out, reduce_degraded = await summarize(merged, bullets)
+    else:
+        out, reduce_degraded = await _summarize_once(merged, bullets, REDUCE_INSTRUCTION)
+    return out, degraded or reduce_degraded
 
-    SUMMARY_CACHE[cache_key] = out
+async def summarize_to_bullets(text: str, bullets: int = 10) -> List[str]:
+    """Como summarize(), devolvendo só os bullets."""
+    out, _ = await summarize(text, bullets)
     return out
@@ -0,0 +1,51 @@
+"""Coalescência de chamadas idênticas em voo ("single-flight").
+
+Chamadas concorrentes com a mesma chave esperam uma única execução e recebem
+o mesmo resultado (ou a mesma exceção). A execução roda numa task própria:
+cancelar um dos chamadores não derruba os outros, e ela só é cancelada quando
+o último deixa de esperar. Nada fica guardado depois que a chamada termina;
+o cache é outra camada.
+"""
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[T]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Executa `fn()` ou, se já houver uma chamada com `key` em voo, espera por ela."""
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # ninguém mais espera: cancela e libera a chave para a próxima chamada
+                self._forget(key, call)
+                call.task.cancel()
@@ -0,0 +1,117 @@
+"""Contabilização de uso do LLM em segundo plano.
+
+As chamadas do gateway registram tokens, latência, modelo e endpoint num
+buffer em memória; uma tarefa grava o buffer em usage_logs com um único
+INSERT em lote a cada USAGE_FLUSH_SECONDS. Nada disso entra no caminho da
+requisição. O usuário vem de `current_user_id`, preenchido em
+get_current_user e pelo worker de jobs.
+"""
+import asyncio
+import logging
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from sqlalchemy import insert
+from app.config import settings
+from app.db import writer as db_writer
+from app.db.session import AsyncSessionLocal
+from app.models.usage_log import UsageLog
+
+log = logging.getLogger(__name__)
+
+current_user_id: ContextVar[int | None] = ContextVar("current_user_id", default=None)
+
+
+class UsageBuffer:
+    def __init__(self, flush_seconds: float, max_pending: int):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._rows: deque[dict] = deque(maxlen=max_pending)
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self.dropped = 0
+
+    def record(self, endpoint: str, model: str, tokens_in: int, tokens_out: int, latency_ms: int) -> None:
+        user_id = current_user_id.get()
+        if user_id is None:
+            return
+        if len(self._rows) == self.max_pending:
+            # banco fora do ar: o deque descarta o mais antigo em vez de crescer sem limite
+            self.dropped += 1
+        self._rows.append({
+            "user_id": user_id, "endpoint": endpoint, "model": model,
+            "tokens_in": tokens_in, "tokens_out": tokens_out,
+            "latency_ms": latency_ms, "created_at": datetime.utcnow(),
+        })
+        if len(self._rows) >= self.max_pending // 2:
+            self._wake.set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def _requeue(self, rows: list[dict]) -> None:
+        """Devolve linhas não gravadas à frente do buffer; se passar do limite, caem as mais antigas."""
+        merged = deque(rows, maxlen=self.max_pending)
+        merged.extend(self._rows)
+        self.dropped += len(rows) + len(self._rows) - len(merged)
+        self._rows = merged
+
+    async def flush(self) -> None:
+        if not self._rows:
+            return
+        rows, self._rows = list(self._rows), deque(maxlen=self.max_pending)
+
+        async def insert_rows(db) -> None:
+            await db.execute(insert(UsageLog), rows)
+
+        def failed() -> None:
+            log.warning("falha ao gravar %d registro(s) de uso; tentando de novo no próximo ciclo", len(rows))
+            self._requeue(rows)
+
+        if db_writer.writer is not None and db_writer.writer.alive:
+            db_writer.writer.submit(insert_rows, on_error=failed)
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await insert_rows(db)
+                await db.commit()
+        except Exception:
+            log.exception("falha ao gravar %d registro(s) de uso", len(rows))
+            self._requeue(rows)
+
+
+usage: UsageBuffer | None = None
+
+
+def record(endpoint: str, model: str, tokens_in: int, tokens_out: int, latency_ms: int) -> None:
+    if usage is not None:
+        usage.record(endpoint, model, tokens_in, tokens_out, latency_ms)
+
+
+def start_usage() -> None:
+    global usage
+    usage = UsageBuffer(settings.usage_flush_seconds, settings.usage_max_pending)
+    usage.start()
+
+
+async def stop_usage() -> None:
+    global usage
+    if usage is not None:
+        u, usage = usage, None
+        await u.stop()
@@ -2,15 +2,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.middleware.ratelimit import RateLimitMiddleware, make_key_func
+from app.middleware.ratelimit import RateLimitMiddleware, make_key_func, make_backend
 from app.middleware.auth import auth_middleware
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.metrics import registry as metrics_registry
+from app.metrics.routes import router as metrics_router
 from app.config import settings
 from app.db.session import init_db
+from app.db import writer as db_writer
+from app.llm import llm_gateway, usage as llm_usage
+from app.jobs import worker as job_worker
+from app.uploads import pdf as pdf_extract
+from app.utils import security
 from app.auth.routes import router as auth_router
 from app.documents.routes import router as documents_router
 from app.uploads.routes import router as upload_router
 from app.web.routes_ui import router as ui_router
 from app.tutor.routes import router as tutor_router
+from app.jobs.routes import router as jobs_router
 
 def create_app() -> FastAPI:
     app = FastAPI(title=settings.app_name)
@@ -29,14 +39,23 @@ def create_app() -> FastAPI:
         max_calls=settings.rate_limit_max_calls,
         key_func=make_key_func(settings.secret_key),
         include_path_prefixes=("/tools", "/upload"),
+        backend=make_backend(settings.rate_limit_backend, settings.redis_url),
+    )
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_bytes=settings.upload_max_request_mb * 1024 * 1024,
+        include_path_prefixes=("/upload", "/tutor/upload"),
     )
     app.middleware("http")(auth_middleware)
+    app.add_middleware(MetricsMiddleware)
 
     app.include_router(auth_router)
     app.include_router(documents_router)
     app.include_router(upload_router)
     app.include_router(ui_router)
     app.include_router(tutor_router)
+    app.include_router(jobs_router)
+    app.include_router(metrics_router)
 
     app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
 
@@ -44,6 +63,22 @@ def create_app() -> FastAPI:
     def on_startup():
         init_db()
 
+    @app.on_event("startup")
+    async def on_startup_jobs():
+        db_writer.start_writer()
+        llm_usage.start_usage()
+        await job_worker.start_pool()
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        await job_worker.stop_pool()
+        await llm_usage.stop_usage()
+        await db_writer.stop_writer()
+        await llm_gateway.aclose()
+        pdf_extract.shutdown_pool()
+        security.shutdown_pool()
+        metrics_registry.mark_process_dead()
+
     @app.get("/", tags=["root"])
     def root():
         return {"name": settings.app_name, "env": settings.app_env}
@@ -0,0 +1,112 @@
+"""Métricas no formato do Prometheus.
+
+Com vários workers (uvicorn --workers N / gunicorn), defina
+PROMETHEUS_MULTIPROC_DIR para um diretório vazio antes de subir o processo:
+cada worker grava suas séries em arquivos mmap e /metrics agrega todos.
+"""
+import functools
+import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from sqlalchemy import event
+
+MULTIPROC = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento.",
+    multiprocess_mode="livesum",
+)
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds", "Duração das chamadas ao LLM por função do gateway.",
+    ["function"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+LLM_ERRORS = Counter("llm_call_errors_total", "Chamadas ao LLM que terminaram em erro.", ["function", "error"])
+LLM_COALESCED = Counter(
+    "llm_coalesced_calls_total", "Chamadas que esperaram outra idêntica já em voo em vez de ir ao provedor.", ["function"]
+)
+LLM_CACHE_REQUESTS = Counter(
+    "llm_cache_requests_total", "Consultas ao cache do LLM por resultado (hit, redis_hit, miss, early_refresh).",
+    ["namespace", "result"],
+)
+EXTRACT_CACHE_REQUESTS = Counter(
+    "extract_cache_requests_total", "Consultas ao cache de texto extraído de PDFs por resultado (hit, miss).", ["result"]
+)
+EXTRACT_CACHE_BYTES = Gauge(
+    "extract_cache_bytes", "Bytes no cache de texto extraído segundo o índice de cada worker (o limite vale por worker).",
+    multiprocess_mode="liveall",
+)
+RATE_LIMITED = Counter("ratelimit_rejections_total", "Respostas 429 do RateLimitMiddleware.")
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use", "Conexões do pool do banco emprestadas agora (compare com pool_size + max_overflow).",
+    ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_HELD = Histogram(
+    "db_pool_connection_held_seconds", "Tempo entre o checkout e a devolução de uma conexão do pool.",
+    ["engine"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CONNECTS = Counter("db_pool_connects_total", "Conexões novas abertas pelo pool do banco.", ["engine"])
+
+
+def observe_llm(function: str):
+    """Decorator para funções async do gateway: mede duração e conta erros."""
+    def deco(fn):
+        hist = LLM_LATENCY.labels(function)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                LLM_ERRORS.labels(function, type(e).__name__).inc()
+                raise
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+
+def instrument_pool(pool, engine_name: str) -> None:
+    """Eventos do pool: conexões em uso, tempo emprestadas e conexões novas abertas.
+    Pool saturado aparece como em uso no teto com tempo emprestado alto."""
+    in_use = DB_POOL_IN_USE.labels(engine_name)
+    held = DB_POOL_HELD.labels(engine_name)
+    connects = DB_POOL_CONNECTS.labels(engine_name)
+
+    def on_checkout(_dbapi_conn, record, _proxy):
+        record.info["metrics_checkout"] = time.perf_counter()
+        in_use.inc()
+
+    def on_release(_dbapi_conn, record):
+        t0 = record.info.pop("metrics_checkout", None)
+        if t0 is not None:
+            in_use.dec()
+            held.observe(time.perf_counter() - t0)
+
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_release)
+    # conexão invalidada/desanexada enquanto emprestada não volta pelo checkin
+    event.listen(pool, "detach", on_release)
+    event.listen(pool, "connect", lambda _dbapi_conn, _record: connects.inc())
+
+
+def render() -> tuple[bytes, str]:
+    if MULTIPROC:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    if MULTIPROC:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,19 @@
+import secrets
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import Response
+from app.config import settings
+from app.metrics.registry import render
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Fora de dev/test exige METRICS_TOKEN; sem token configurado, a rota não existe."""
+    if settings.metrics_token:
+        auth = request.headers.get("authorization", "")
+        if not secrets.compare_digest(auth, f"Bearer {settings.metrics_token}"):
+            raise HTTPException(status_code=401, detail="Não autorizado")
+    elif settings.app_env not in ("dev", "test"):
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, content_type = render()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,33 @@
+import time
+from app.metrics.registry import HTTP_IN_FLIGHT, HTTP_LATENCY
+
+class MetricsMiddleware:
+    """Latência por rota (o template, ex.: /tutor/doc/{doc_id}, não o caminho
+    concreto) e requisições em andamento."""
+
+    def __init__(self, app, *, exclude_paths=("/metrics",)):
+        self.app = app
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            # caminhos sem rota ficam agrupados para não explodir a cardinalidade
+            template = getattr(route, "path", None) or "<unmatched>"
+            HTTP_LATENCY.labels(scope.get("method", ""), template, str(status)).observe(time.perf_counter() - t0)
@@ -1,10 +1,146 @@
 import time
+import math
 import asyncio
+import logging
+import uuid
 from collections import deque
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Protocol
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from jose import jwt, JWTError
+from app.auth.principal import get_principal
+from app.metrics.registry import RATE_LIMITED
+
+log = logging.getLogger(__name__)
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, window: int, max_calls: int) -> tuple[bool, int]:
+        """Registra uma chamada de `key`. Retorna (permitida, segundos até liberar)."""
+        ...
+
+
+class SlidingLogBackend:
+    """Log de timestamps por chave (implementação original). Memória O(max_calls)
+    por chave, um lock global e chaves ociosas nunca são removidas; fica só para
+    comparação (RATE_LIMIT_BACKEND=sliding)."""
+
+    def __init__(self):
+        self._buckets: dict[str, deque[float]] = {}
+        self._lock = asyncio.Lock()
+
+    async def hit(self, key: str, window: int, max_calls: int) -> tuple[bool, int]:
+        now = time.time()
+        async with self._lock:
+            q = self._buckets.get(key)
+            if q is None:
+                q = deque()
+                self._buckets[key] = q
+
+            cutoff = now - window
+            while q and q[0] < cutoff:
+                q.popleft()
+
+            if len(q) >= max_calls:
+                return False, max(1, int(q[0] + window - now))
+
+            q.append(now)
+            return True, 0
+
+
+class InMemoryBackend:
+    """GCRA por processo (padrão): guarda só o "theoretical arrival time" de cada
+    chave, um float. Permite rajadas de até max_calls e depois 1 chamada a cada
+    window/max_calls segundos. Sem lock: hit() não tem await, então é atômico no
+    event loop. Chaves ociosas (TAT já no passado equivale a estado novo) são
+    varridas aos poucos, um shard por vez."""
+
+    def __init__(self, shards: int = 64, sweep_every: int = 256):
+        self._shards: list[dict[str, float]] = [{} for _ in range(shards)]
+        self._sweep_every = sweep_every
+        self._calls = 0
+        self._next_shard = 0
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+    def _sweep(self, now: float) -> None:
+        shard = self._shards[self._next_shard]
+        self._next_shard = (self._next_shard + 1) % len(self._shards)
+        idle = [k for k, tat in shard.items() if tat <= now]
+        for k in idle:
+            del shard[k]
+
+    async def hit(self, key: str, window: int, max_calls: int) -> tuple[bool, int]:
+        now = time.monotonic()
+        self._calls += 1
+        if self._calls % self._sweep_every == 0:
+            self._sweep(now)
+
+        shard = self._shards[hash(key) % len(self._shards)]
+        interval = window / max_calls
+        tat = max(shard.get(key, now), now)
+        # folga para o arredondamento de somar window/max_calls várias vezes
+        excess = tat - now - (window - interval)
+        if excess > 1e-6:
+            return False, max(1, math.ceil(excess))
+        shard[key] = tat + interval
+        return True, 0
+
+
+# Janela deslizante num sorted set: score = instante da chamada (relógio do Redis,
+# igual para todos os workers). Tudo roda atômico dentro do script.
+_SLIDING_WINDOW_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = tonumber(ARGV[1])
+local max_calls = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+if redis.call('ZCARD', KEYS[1]) >= max_calls then
+  local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+  return {0, tonumber(oldest[2]) + window - now}
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, 0}
+"""
+
+
+class RedisBackend:
+    """Janela deslizante compartilhada entre workers/instâncias via Redis.
+    Se o Redis ficar indisponível, deixa passar (fail-open) em vez de derrubar o upload."""
+
+    def __init__(self, client, prefix: str = "rl:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_SLIDING_WINDOW_LUA)
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "rl:") -> "RedisBackend":
+        from redis.asyncio import Redis
+        return cls(Redis.from_url(url), prefix=prefix)
+
+    async def hit(self, key: str, window: int, max_calls: int) -> tuple[bool, int]:
+        try:
+            allowed, retry_ms = await self._script(
+                keys=[self.prefix + key],
+                args=[window * 1000, max_calls, uuid.uuid4().hex],
+            )
+        except Exception:
+            log.warning("rate limit: Redis indisponível, liberando %s", key, exc_info=True)
+            return True, 0
+        return bool(allowed), max(1, -(-int(retry_ms) // 1000)) if not allowed else 0
+
+
+def make_backend(kind: str, redis_url: str | None = None) -> RateLimitBackend:
+    if kind == "redis":
+        if not redis_url:
+            raise ValueError("RATE_LIMIT_BACKEND=redis exige REDIS_URL")
+        return RedisBackend.from_url(redis_url)
+    if kind == "memory":
+        return InMemoryBackend()
+    if kind == "sliding":
+        return SlidingLogBackend()
+    raise ValueError(f"RATE_LIMIT_BACKEND desconhecido: {kind}")
+
 
 class RateLimitMiddleware:
     def __init__(
@@ -15,15 +151,14 @@ class RateLimitMiddleware:
         max_calls: int,
         key_func: Callable[[Request], str],
         include_path_prefixes: Iterable[str] = ("/tools", "/upload"),
+        backend: RateLimitBackend | None = None,
     ):
         self.app = app
         self.window = window_seconds
         self.max_calls = max_calls
         self.key_func = key_func
         self.include_paths = tuple(include_path_prefixes)
-
-        self._buckets: dict[str, deque[float]] = {}
-        self._lock = asyncio.Lock()
+        self.backend = backend or InMemoryBackend()
 
     def _should_guard(self, path: str) -> bool:
         return any(path.startswith(p) for p in self.include_paths)
@@ -39,33 +174,21 @@ class RateLimitMiddleware:
         request = Request(scope, receive=receive)
         key = self.key_func(request)
 
-        now = time.time()
-        async with self._lock:
-            q = self._buckets.get(key)
-            if q is None:
-                q = deque()
-                self._buckets[key] = q
-
-            cutoff = now - self.window
-            while q and q[0] < cutoff:
-                q.popleft()
-
-            if len(q) >= self.max_calls:
-                retry_after = max(1, int(q[0] + self.window - now))
-                resp = JSONResponse(
-                    status_code=429,
-                    content={
-                        "detail": "Too Many Requests",
-                        "key": key,
-                        "window_seconds": self.window,
-                        "max_calls": self.max_calls,
-                        "try_again_in": retry_after,
-                    },
-                )
-                resp.headers["Retry-After"] = str(retry_after)
-                return await resp(scope, receive, send)
-
-            q.append(now)
+        allowed, retry_after = await self.backend.hit(key, self.window, self.max_calls)
+        if not allowed:
+            RATE_LIMITED.inc()
+            resp = JSONResponse(
+                status_code=429,
+                content={
+                    "detail": "Too Many Requests",
+                    "key": key,
+                    "window_seconds": self.window,
+                    "max_calls": self.max_calls,
+                    "try_again_in": retry_after,
+                },
+            )
+            resp.headers["Retry-After"] = str(retry_after)
+            return await resp(scope, receive, send)
 
         return await self.app(scope, receive, send)
 
@@ -74,16 +197,9 @@ def make_key_func(secret_key: str) -> Callable[[Request], str]:
     def _key(req: Request) -> str:
         ip = req.client.host if req.client else "unknown"
 
-        auth = req.headers.get("authorization", "")
-        if auth.lower().startswith("bearer "):
-            token = auth.split(" ", 1)[1].strip()
-            try:
-                payload = jwt.decode(token, secret_key, algorithms=["HS256"])
-                sub = payload.get("sub")
-                if sub:
-                    return f"user:{sub}"
-            except JWTError:
-                pass
+        sub = get_principal(req)
+        if sub:
+            return f"user:{sub}"
 
         return f"ip:{ip}"
     return _key
@@ -0,0 +1,43 @@
+from typing import Iterable
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+class UploadSizeLimitMiddleware:
+    """Recusa uploads grandes antes do parsing do multipart: pelo Content-Length,
+    quando informado, ou assim que o corpo recebido passa do limite."""
+
+    def __init__(self, app, *, max_bytes: int, include_path_prefixes: Iterable[str] = ("/upload", "/tutor/upload")):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.include_paths = tuple(include_path_prefixes)
+
+    def _should_guard(self, path: str) -> bool:
+        return any(path.startswith(p) for p in self.include_paths)
+
+    def _detail(self) -> str:
+        return f"Upload maior que {self.max_bytes // (1024 * 1024)}MB."
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or not self._should_guard(scope.get("path", "")):
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_bytes:
+                    resp = JSONResponse(status_code=413, content={"detail": self._detail()})
+                    return await resp(scope, receive, send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # HTTPException atravessa o parsing do form e vira 413 no handler do FastAPI
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        return await self.app(scope, limited_receive, send)
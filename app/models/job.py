@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from datetime import datetime
+from app.db.session import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    document_id = Column(Integer, ForeignKey("tutor_documents.id"), nullable=True, index=True)
+    kind = Column(String(30), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    payload_json = Column(Text, nullable=False, default="{}")
+    result_url = Column(String(255))
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(64))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
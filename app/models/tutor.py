@@ -1,16 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from app.db.session import Base
+from app.db.types import CompressedText
 
 class TutorDocument(Base):
     __tablename__ = "tutor_documents"
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  
     title = Column(String(255), nullable=False)
-    content = Column(Text, nullable=False)
+    content = deferred(Column(CompressedText, nullable=False))
     sources_json = Column(Text, default="[]")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (Index("ix_tutor_documents_owner_created", "owner_id", "created_at", "id"),)
+
 
 class TutorChatMessage(Base):
     __tablename__ = "tutor_chat_messages"
@@ -27,7 +31,7 @@ class StudyPlan(Base):
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey("tutor_documents.id"), index=True, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  
-    plan_md = Column(Text, nullable=False)
+    plan_md = deferred(Column(CompressedText, nullable=False))
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -37,7 +41,7 @@ class Quiz(Base):
     document_id = Column(Integer, ForeignKey("tutor_documents.id"), index=True, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  
     quiz_type = Column(String(10), nullable=False)
-    items_json = Column(Text, nullable=False)
+    items_json = Column(CompressedText, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -46,7 +50,36 @@ class QuizAttempt(Base):
     id = Column(Integer, primary_key=True)
     quiz_id = Column(Integer, ForeignKey("quizzes.id"), index=True, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  
-    answers_json = Column(Text, nullable=False)
+    answers_json = deferred(Column(Text, nullable=False))
     score = Column(Integer, nullable=False)
     max_score = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_quiz_attempts_owner_created", "owner_id", "created_at", "id"),)
+
+class DocumentSummary(Base):
+    __tablename__ = "document_summaries"
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("tutor_documents.id"), unique=True, index=True, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    bullets_json = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("tutor_documents.id"), index=True, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    ord = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    embedding_json = Column(Text)
+
+
+class QuizStat(Base):
+    __tablename__ = "quiz_stats"
+    quiz_id = Column(Integer, ForeignKey("quizzes.id"), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
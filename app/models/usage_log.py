@@ -7,6 +7,7 @@ class UsageLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     endpoint = Column(String(120))
+    model = Column(String(80))
     tokens_in = Column(Integer, default=0)
     tokens_out = Column(Integer, default=0)
     cost = Column(String(50), default="0")
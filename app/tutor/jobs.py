@@ -0,0 +1,48 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.jobs.worker import handler
+from app.models.job import Job
+from app.models.tutor import TutorDocument, StudyPlan, Quiz
+from app.tutor.refs import refs_md
+from app.tutor.rag import build_context
+from app.tutor.summary import get_summary
+from app.tutor.stats import init_quiz_stat
+from app.tutor.study import create_study_plan_md, generate_mixed_quiz
+import json
+
+async def _job_doc(db: AsyncSession, job: Job) -> TutorDocument:
+    doc = await db.scalar(select(TutorDocument).where(
+        TutorDocument.id == job.document_id,
+        TutorDocument.owner_id == job.owner_id,
+    ))
+    if doc is None:
+        raise LookupError("Documento não encontrado")
+    return doc
+
+@handler("study_plan")
+async def run_study_plan(db: AsyncSession, job: Job, payload: dict) -> str:
+    doc = await _job_doc(db, job)
+    context = await build_context(db, doc)
+    md = await create_study_plan_md(context, horas_semanais=payload["horas_semanais"], semanas=payload["semanas"])
+    md = md + refs_md(doc)
+    db.add(StudyPlan(document_id=doc.id, owner_id=job.owner_id, plan_md=md))
+    await db.commit()
+    return f"/tutor/doc/{doc.id}/study"
+
+@handler("quiz")
+async def run_quiz(db: AsyncSession, job: Job, payload: dict) -> str:
+    doc = await _job_doc(db, job)
+    context = await build_context(db, doc, queries=await get_summary(db, doc))
+    result = await generate_mixed_quiz(context, payload["tipos"], n=payload["n"])
+    if not result["items"]:
+        raise RuntimeError("Nenhuma questão pôde ser gerada")
+    q = Quiz(
+        document_id=doc.id,
+        owner_id=job.owner_id,
+        quiz_type=result["type"],
+        items_json=json.dumps(result["items"], ensure_ascii=False),
+    )
+    db.add(q); await db.flush()
+    init_quiz_stat(db, q.id)
+    await db.commit()
+    return f"/tutor/quiz/{q.id}"
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Any, List, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return f"{created_at.isoformat()}_{row_id}"
+
+def decode_cursor(cursor: str | None) -> Tuple[datetime, int] | None:
+    if not cursor:
+        return None
+    try:
+        ts, row_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:
+        return None
+
+async def keyset_page(db: AsyncSession, stmt: Select, created_col, id_col, cursor: str | None, limit: int,
+                      row_keys: Tuple[str, str] | None = None) -> Tuple[List[Any], str | None]:
+    """Página em ordem (created_at, id) decrescente, começando depois de `cursor`.
+    Usa o índice em vez de OFFSET, então o custo não cresce com a página.
+    Um select de uma só entidade devolve os objetos; com várias colunas, as linhas.
+    `row_keys` são os nomes dessas colunas na linha, se a consulta usar labels.
+    Devolve (linhas, cursor da próxima página ou None)."""
+    after = decode_cursor(cursor)
+    if after is not None:
+        ts, row_id = after
+        stmt = stmt.where(or_(created_col < ts, and_(created_col == ts, id_col < row_id)))
+    res = await db.execute(stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1))
+    rows = res.scalars().all() if len(stmt.column_descriptions) == 1 else res.all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    ts_key, id_key = row_keys or (created_col.key, id_col.key)
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_key), getattr(last, id_key))
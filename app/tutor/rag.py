@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import re
+from typing import List
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.llm.llm_gateway import embed
+from app.models.tutor import TutorDocument, DocumentChunk
+from app.tutor.vector_index import get_user_index
+
+log = logging.getLogger(__name__)
+
+def clean_text(s: str) -> str:
+    return re.sub(r"\s+", " ", s or "").strip()
+
+def simple_chunk(text: str, max_tokens: int = 300, overlap_tokens: int = 40) -> List[str]:
+    """Quebra o texto em janelas de ~max_tokens palavras com sobreposição,
+    tentando terminar cada janela no fim de uma frase."""
+    words = clean_text(text).split(" ")
+    if not words or words == [""]:
+        return []
+    chunks = []
+    i = 0
+    while i < len(words):
+        window = words[i:i + max_tokens]
+        chunk = " ".join(window)
+        if i + max_tokens < len(words):
+            m = re.search(r"^(.*[\.!?])\s+[^\.!?]*$", chunk)
+            if m and len(m.group(1)) > len(chunk) // 2:
+                chunk = m.group(1)
+        chunks.append(chunk)
+        if i + max_tokens >= len(words):
+            break
+        i += max(1, chunk.count(" ") + 1 - overlap_tokens)
+    return chunks
+
+async def _embed_batched(texts: List[str]) -> List[List[float]] | None:
+    out: List[List[float]] = []
+    step = settings.rag_embed_batch
+    try:
+        for i in range(0, len(texts), step):
+            out.extend(await embed(texts[i:i + step]))
+    except Exception:
+        log.exception("falha ao gerar embeddings; recuperação cairá para amostragem")
+        return None
+    return out
+
+async def index_document(db: AsyncSession, doc: TutorDocument) -> List[DocumentChunk]:
+    """(Re)cria os chunks do documento com seus embeddings. Documentos que cabem
+    em RAG_MAX_CONTEXT_CHARS vão inteiros no contexto e não são indexados."""
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == doc.id))
+    content = await doc.awaitable_attrs.content
+    if len(content or "") <= settings.rag_max_context_chars:
+        await db.commit()
+        await asyncio.to_thread(get_user_index(doc.owner_id).drop_document, doc.id)
+        return []
+    texts = simple_chunk(content, settings.rag_chunk_tokens, settings.rag_chunk_overlap_tokens)
+    vectors = await _embed_batched(texts) if texts else None
+    rows = []
+    for i, t in enumerate(texts):
+        emb = json.dumps(vectors[i]) if vectors else None
+        rows.append(DocumentChunk(document_id=doc.id, owner_id=doc.owner_id, ord=i, text=t, embedding_json=emb))
+    db.add_all(rows)
+    await db.commit()
+    index = get_user_index(doc.owner_id)
+    await asyncio.to_thread(index.drop_document, doc.id)
+    if vectors:
+        await asyncio.to_thread(index.append, [r.id for r in rows], [doc.id] * len(rows), vectors)
+    return rows
+
+def _spread(chunks: List[DocumentChunk], max_chars: int) -> List[DocumentChunk]:
+    """Sem consulta: amostra chunks espaçados ao longo do documento até o limite."""
+    if not chunks:
+        return []
+    avg = max(1, sum(len(c.text) for c in chunks) // len(chunks))
+    budget = max(1, max_chars // avg)
+    if budget >= len(chunks):
+        return chunks
+    stride = len(chunks) / budget
+    return [chunks[int(i * stride)] for i in range(budget)]
+
+def _join(chunks: List[DocumentChunk], max_chars: int) -> str:
+    """Escolhe chunks na ordem de prioridade recebida até o limite e os junta na ordem do documento."""
+    chosen, used = [], 0
+    for c in chunks:
+        if used + len(c.text) > max_chars and chosen:
+            continue
+        chosen.append(c)
+        used += len(c.text) + 2
+    return "\n\n".join(c.text for c in sorted(chosen, key=lambda c: c.ord))
+
+async def build_context(db: AsyncSession, doc: TutorDocument, queries: List[str] | None = None,
+                        k: int | None = None, max_chars: int | None = None) -> str:
+    """Devolve só os trechos relevantes do documento, com tamanho limitado.
+    Documentos pequenos vão inteiros; sem `queries`, amostra o documento todo."""
+    max_chars = max_chars or settings.rag_max_context_chars
+    k = k or settings.rag_top_k
+    content = await doc.awaitable_attrs.content
+    if len(content or "") <= max_chars:
+        return content
+
+    chunks = (await db.scalars(
+        select(DocumentChunk)
+        .where(DocumentChunk.document_id == doc.id)
+        .order_by(DocumentChunk.ord)
+    )).all()
+    if not chunks:
+        chunks = await index_document(db, doc)
+
+    queries = [q for q in (queries or []) if q and q.strip()]
+    if not queries:
+        return _join(_spread(chunks, max_chars), max_chars)
+
+    index = get_user_index(doc.owner_id)
+    missing = [c for c in chunks if c.embedding_json is None]
+    if missing:
+        # embeddings falharam no upload: tenta de novo agora, só para os que faltam
+        vectors = await _embed_batched([c.text for c in missing])
+        if not vectors:
+            return _join(_spread(chunks, max_chars), max_chars)
+        for c, v in zip(missing, vectors):
+            c.embedding_json = json.dumps(v)
+        await db.commit()
+        await asyncio.to_thread(index.drop_document, doc.id)
+
+    qvecs = await _embed_batched(queries)
+    if not qvecs:
+        return _join(_spread(chunks, max_chars), max_chars)
+
+    # índice perdido ou criado antes dos embeddings em disco: reconstrói do banco
+    await asyncio.to_thread(index.ensure_document, doc.id, [c.id for c in chunks],
+                            lambda: [json.loads(c.embedding_json) for c in chunks])
+
+    hits = await asyncio.to_thread(lambda: [index.search(qv, k, document_id=doc.id) for qv in qvecs])
+    by_id = {c.id: c for c in chunks}
+    ranked = [[by_id[cid] for cid, _ in top if cid in by_id] for top in hits]
+    # intercala os rankings (1º de cada consulta, depois 2º...) para que o
+    # limite de caracteres corte primeiro os trechos menos relevantes
+    picked: dict[int, DocumentChunk] = {}
+    for rank in range(k):
+        for top in ranked:
+            if rank < len(top):
+                picked.setdefault(top[rank].id, top[rank])
+    return _join(list(picked.values()), max_chars)
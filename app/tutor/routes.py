@@ -2,12 +2,21 @@ from fastapi import APIRouter, Request, UploadFile, Form, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from app.auth.deps import get_db, get_current_user
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer
+from app.config import settings
 from app.models.tutor import TutorDocument, TutorChatMessage, StudyPlan, Quiz, QuizAttempt
 from app.models.user import User
-from app.tutor.study import create_study_plan_md, generate_quiz, grade_discursive_batch
-from app.llm.llm_gateway import summarize_to_bullets
+from app.tutor.study import grade_discursive_batch
+from app.jobs.queue import enqueue
+from app.db.writer import write
+from app.tutor.summary import get_summary, store_summary
+from app.tutor.stats import quiz_stats_rows, attempt_rows_page, record_attempt
+from app.tutor.pagination import keyset_page
+from app.tutor.rag import build_context, index_document
+from app.uploads.pdf import extract_cleaned
+from app.uploads.spool import spool_upload, UploadTooLarge
 from markupsafe import Markup
 import markdown
 from app.tutor.refs import refs_md, get_refs
@@ -18,56 +27,59 @@ from typing import Optional, List, Annotated
 router = APIRouter(prefix="/tutor", tags=["tutor"])
 templates = Jinja2Templates(directory="app/web/templates")
 
-def _extract_pdf(file: UploadFile) -> str:
+async def _extract_pdf(file: UploadFile) -> str:
     MAX_MB = 10
-    data = file.file.read()
-    if len(data) > MAX_MB * 1024 * 1024:
+    try:
+        spooled = await spool_upload(file, MAX_MB * 1024 * 1024)
+    except UploadTooLarge:
         return ""
     try:
-        from pdfminer.high_level import extract_text
-        import io
-        return extract_text(io.BytesIO(data)) or ""
+        with await extract_cleaned(spooled) as out:
+            return out.read()
     except Exception:
         try:
-            return data.decode("utf-8", errors="ignore")
+            with open(spooled.path, "rb") as f:
+                return f.read().decode("utf-8", errors="ignore")
         except Exception:
             return ""
+    finally:
+        spooled.discard()
 
 def _clean_text(s: str) -> str:
     import re
     s = s.replace("\r", " ").replace("\n", " ").replace("\t", " ")
     return re.sub(r"\s+", " ", s).strip()
 
-def _get_doc_user_safe(db: Session, user_id: int, doc_id: int) -> TutorDocument | None:
-    return db.query(TutorDocument).filter(
+async def _get_doc_user_safe(db: AsyncSession, user_id: int, doc_id: int) -> TutorDocument | None:
+    return await db.scalar(select(TutorDocument).where(
         TutorDocument.id == doc_id,
         TutorDocument.owner_id == user_id
-    ).first()
+    ))
 
 @router.get("", response_class=HTMLResponse)
-def tutor_home(request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    docs = (db.query(TutorDocument)
-              .filter(TutorDocument.owner_id == user.id)
-              .order_by(TutorDocument.created_at.desc())
-              .all())
-    return templates.TemplateResponse("tutor/index.html", {"request": request, "docs": docs})
+async def tutor_home(request: Request, before: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    stmt = (select(TutorDocument)
+              .options(load_only(TutorDocument.id, TutorDocument.title, TutorDocument.created_at))
+              .where(TutorDocument.owner_id == user.id))
+    docs, next_cursor = await keyset_page(db, stmt, TutorDocument.created_at, TutorDocument.id, before, settings.page_size)
+    return templates.TemplateResponse("tutor/index.html", {"request": request, "docs": docs, "next_cursor": next_cursor})
 
 @router.post("/upload", response_class=HTMLResponse)
-def upload(
+async def upload(
     request: Request,
     title: str = Form(...),
     text: str = Form(""),
     sources: str = Form("[]"),
     file: UploadFile | None = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     content = text or ""
     if file and file.filename:
         if file.filename.lower().endswith(".pdf"):
-            content += "\n" + _extract_pdf(file)
+            content += "\n" + await _extract_pdf(file)
         else:
-            content += "\n" + file.file.read().decode("utf-8", errors="ignore")
+            content += "\n" + (await file.read()).decode("utf-8", errors="ignore")
     content = _clean_text(content)
     if not content.strip():
         return RedirectResponse(url="/tutor", status_code=303)
@@ -82,66 +94,26 @@ def upload(
     sources_json = json.dumps(parsed_sources, ensure_ascii=False)
 
     doc = TutorDocument(owner_id=user.id, title=title or "Sem Título", content=content, sources_json=sources_json)
-    db.add(doc); db.commit(); db.refresh(doc)
+    db.add(doc); await db.commit()
+    await store_summary(db, doc)
+    await index_document(db, doc)
     return RedirectResponse(url=f"/tutor/doc/{doc.id}", status_code=303)
 
 @router.get("/doc/{doc_id}", response_class=HTMLResponse)
-def doc_detail(request: Request, doc_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    doc = _get_doc_user_safe(db, user.id, doc_id)
+async def doc_detail(request: Request, doc_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    doc = await _get_doc_user_safe(db, user.id, doc_id)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
 
-    summary = summarize_to_bullets(doc.content, bullets=10)
+    summary = await get_summary(db, doc)
     refs = refs_md(doc)
 
-    quiz_stats = (
-        db.query(
-            Quiz.id.label("quiz_id"),
-            Quiz.quiz_type.label("quiz_type"),
-            Quiz.created_at.label("created_at"),
-            func.count(QuizAttempt.id).label("attempts"),
-            func.coalesce(func.avg(QuizAttempt.score), 0).label("avg_score"),
-            func.coalesce(func.max(QuizAttempt.score), 0).label("best_score"),
-        )
-        .outerjoin(QuizAttempt, QuizAttempt.quiz_id == Quiz.id)
-        .filter(
-            Quiz.document_id == doc_id,
-            Quiz.owner_id == user.id,
-        )
-        .group_by(Quiz.id)
-        .order_by(Quiz.created_at.desc())
-        .all()
-    )
-
-    attempt_rows = (
-        db.query(
-            QuizAttempt.id.label("attempt_id"),
-            QuizAttempt.created_at.label("attempt_at"),
-            QuizAttempt.score.label("score"),
-            QuizAttempt.max_score.label("max_score"),
-            Quiz.quiz_type.label("quiz_type"),
-            Quiz.id.label("quiz_id"),
-        )
-        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
-        .filter(
-            Quiz.document_id == doc_id,
-            Quiz.owner_id == user.id,
-            QuizAttempt.owner_id == user.id,
-        )
-        .order_by(QuizAttempt.created_at.desc())
-        .all()
-    )
-
-    type_labels = {"vf": "Verdadeiro/Falso", "mc": "Alternativas", "disc": "Discursiva"}
     return templates.TemplateResponse(
         "tutor/doc_detail.html",
         {
             "request": request,
             "doc": doc,
             "summary": summary,
-            "quiz_stats": quiz_stats,
-            "attempt_rows": attempt_rows,
-            "type_labels": type_labels,
             "refs": refs,
         },
     )
@@ -151,20 +123,21 @@ from markupsafe import Markup
 import markdown
 
 @router.get("/doc/{doc_id}/study", response_class=HTMLResponse)
-def study_get(request: Request, doc_id: int,
-              db: Session = Depends(get_db),
+async def study_get(request: Request, doc_id: int,
+              db: AsyncSession = Depends(get_db),
               user: User = Depends(get_current_user)):
 
-    doc = _get_doc_user_safe(db, user.id, doc_id)
+    doc = await _get_doc_user_safe(db, user.id, doc_id)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
 
-    plan = (
-        db.query(StudyPlan)
-        .filter(StudyPlan.document_id == doc_id,
-                StudyPlan.owner_id == user.id)
+    plan = await db.scalar(
+        select(StudyPlan)
+        .options(undefer(StudyPlan.plan_md))
+        .where(StudyPlan.document_id == doc_id,
+               StudyPlan.owner_id == user.id)
         .order_by(StudyPlan.created_at.desc())
-        .first()
+        .limit(1)
     )
 
     rendered_md = None
@@ -181,162 +154,84 @@ def study_get(request: Request, doc_id: int,
     )
 
 @router.post("/doc/{doc_id}/study", response_class=HTMLResponse)
-def study_post( request: Request, doc_id: int, horas_semanais: int = Form(6), semanas: int = Form(4), db: Session = Depends(get_db), user: User = Depends(get_current_user),):
-    doc = _get_doc_user_safe(db, user.id, doc_id)
+async def study_post( request: Request, doc_id: int, horas_semanais: int = Form(6), semanas: int = Form(4), db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user),):
+    doc = await _get_doc_user_safe(db, user.id, doc_id)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
-    md = create_study_plan_md(doc.content, horas_semanais=horas_semanais, semanas=semanas)
-    md = md + refs_md(doc)
-    row = StudyPlan(document_id=doc_id, owner_id=user.id, plan_md=md)
-    db.add(row)
-    db.commit()
-    return RedirectResponse(url=f"/tutor/doc/{doc_id}/study", status_code=303)
+    job = await enqueue(db, user.id, "study_plan", {"horas_semanais": horas_semanais, "semanas": semanas}, document_id=doc_id)
+    return RedirectResponse(url=f"/jobs/{job.id}", status_code=303)
 
 # ----- Provas -----
 @router.get("/doc/{doc_id}/quiz", response_class=HTMLResponse)
-def quiz_select(request: Request, doc_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    doc = _get_doc_user_safe(db, user.id, doc_id)
+async def quiz_select(request: Request, doc_id: int, attempts_before: str | None = None, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    doc = await _get_doc_user_safe(db, user.id, doc_id)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
 
-    quiz_stats = (
-        db.query(
-            Quiz.id.label("quiz_id"),
-            Quiz.quiz_type.label("quiz_type"),
-            Quiz.created_at.label("created_at"),
-            func.count(QuizAttempt.id).label("attempts"),
-            func.coalesce(func.avg(QuizAttempt.score), 0).label("avg_score"),
-            func.coalesce(func.max(QuizAttempt.score), 0).label("best_score"),
-        )
-        .outerjoin(QuizAttempt, QuizAttempt.quiz_id == Quiz.id)
-        .filter(Quiz.document_id == doc_id, Quiz.owner_id == user.id)
-        .group_by(Quiz.id)
-        .order_by(Quiz.created_at.desc())
-        .all()
-    )
+    quiz_stats = await quiz_stats_rows(db, user.id, doc_id)
 
-    attempt_rows = (
-        db.query(
-            QuizAttempt.id.label("attempt_id"),
-            QuizAttempt.created_at.label("attempt_at"),
-            QuizAttempt.score.label("score"),
-            QuizAttempt.max_score.label("max_score"),
-            Quiz.quiz_type.label("quiz_type"),
-            Quiz.id.label("quiz_id"),
-        )
-        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
-        .filter(Quiz.document_id == doc_id, Quiz.owner_id == user.id, QuizAttempt.owner_id == user.id)
-        .order_by(QuizAttempt.created_at.desc())
-        .all()
-    )
+    attempt_rows, attempts_cursor = await attempt_rows_page(db, user.id, doc_id, attempts_before)
 
     type_labels = {"vf": "Verdadeiro/Falso", "mc": "Alternativas", "disc": "Discursiva"}
     return templates.TemplateResponse(
         "tutor/quiz_select.html",
         {"request": request, "doc": doc, "quiz_stats": quiz_stats,
-         "attempt_rows": attempt_rows, "type_labels": type_labels},
+         "attempt_rows": attempt_rows, "attempts_cursor": attempts_cursor, "type_labels": type_labels},
+    )
+
+async def _quiz_select_error(request: Request, db: AsyncSession, user: User, doc: TutorDocument, message: str, status_code: int = 400):
+    doc_id = doc.id
+    quiz_stats = await quiz_stats_rows(db, user.id, doc_id)
+    attempt_rows, attempts_cursor = await attempt_rows_page(db, user.id, doc_id)
+    type_labels = {"vf": "Verdadeiro/Falso", "mc": "Alternativas", "disc": "Discursiva"}
+    return templates.TemplateResponse(
+        "tutor/quiz_select.html",
+        {
+            "request": request,
+            "doc": doc,
+            "quiz_stats": quiz_stats,
+            "attempt_rows": attempt_rows, "attempts_cursor": attempts_cursor,
+            "type_labels": type_labels,
+            "flash_error": message,
+        },
+        status_code=status_code,
     )
 
 @router.post("/doc/{doc_id}/quiz/create", response_class=HTMLResponse)
-def quiz_create(
+async def quiz_create(
     request: Request,
     doc_id: int,
     n: int = Form(10),
     tipos: Annotated[Optional[List[str]], Form()] = None,   # <= opcional
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    doc = _get_doc_user_safe(db, user.id, doc_id)
+    doc = await _get_doc_user_safe(db, user.id, doc_id)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
 
     tipos = [t for t in (tipos or []) if t in ("vf", "mc", "disc")]
     if not tipos:
-        quiz_stats = (
-            db.query(
-                Quiz.id.label("quiz_id"),
-                Quiz.quiz_type.label("quiz_type"),
-                Quiz.created_at.label("created_at"),
-                func.count(QuizAttempt.id).label("attempts"),
-                func.coalesce(func.avg(QuizAttempt.score), 0).label("avg_score"),
-                func.coalesce(func.max(QuizAttempt.score), 0).label("best_score"),
-            )
-            .outerjoin(QuizAttempt, QuizAttempt.quiz_id == Quiz.id)
-            .filter(Quiz.document_id == doc_id, Quiz.owner_id == user.id)
-            .group_by(Quiz.id)
-            .order_by(Quiz.created_at.desc())
-            .all()
-        )
-        attempt_rows = (
-            db.query(
-                QuizAttempt.id.label("attempt_id"),
-                QuizAttempt.created_at.label("attempt_at"),
-                QuizAttempt.score.label("score"),
-                QuizAttempt.max_score.label("max_score"),
-                Quiz.quiz_type.label("quiz_type"),
-                Quiz.id.label("quiz_id"),
-            )
-            .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
-            .filter(Quiz.document_id == doc_id, Quiz.owner_id == user.id, QuizAttempt.owner_id == user.id)
-            .order_by(QuizAttempt.created_at.desc())
-            .all()
-        )
-        type_labels = {"vf": "Verdadeiro/Falso", "mc": "Alternativas", "disc": "Discursiva"}
-        return templates.TemplateResponse(
-            "tutor/quiz_select.html",
-            {
-                "request": request,
-                "doc": doc,
-                "quiz_stats": quiz_stats,
-                "attempt_rows": attempt_rows,
-                "type_labels": type_labels,
-                "flash_error": "Selecione pelo menos um tipo de questão.",
-            },
-            status_code=400,
-        )
-
-    if len(tipos) == 1:
-        payload = generate_quiz(doc.content, quiz_type=tipos[0], n=n)
-        qtype = tipos[0]
-    else:
-        por_tipo = max(1, n // len(tipos))
-        restante = n
-        items = []
-        for t in tipos:
-            p = generate_quiz(doc.content, quiz_type=t, n=por_tipo)
-            take = p["items"][:min(por_tipo, restante)]
-            items.extend(take)
-            restante -= len(take)
-        if restante > 0:
-            extra = generate_quiz(doc.content, quiz_type=tipos[0], n=restante)
-            items.extend(extra["items"][:restante])
-        payload = {"type": "mixed:" + ",".join(tipos), "items": items}
-        qtype = payload["type"]
-
-    q = Quiz(
-        document_id=doc_id,
-        owner_id=user.id,
-        quiz_type=qtype,
-        items_json=json.dumps(payload["items"], ensure_ascii=False),
-    )
-    db.add(q); db.commit(); db.refresh(q)
-    return RedirectResponse(url=f"/tutor/quiz/{q.id}", status_code=303)
+        return await _quiz_select_error(request, db, user, doc, "Selecione pelo menos um tipo de questão.")
+
+    job = await enqueue(db, user.id, "quiz", {"tipos": tipos, "n": n}, document_id=doc_id)
+    return RedirectResponse(url=f"/jobs/{job.id}", status_code=303)
 
 @router.get("/quiz/{quiz_id}", response_class=HTMLResponse)
-def quiz_take(request: Request, quiz_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.owner_id == user.id).first()
+async def quiz_take(request: Request, quiz_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    quiz = await db.scalar(select(Quiz).where(Quiz.id == quiz_id, Quiz.owner_id == user.id))
     if not quiz:
         return RedirectResponse(url="/tutor", status_code=303)
     items = json.loads(quiz.items_json)
-    doc = _get_doc_user_safe(db, user.id, quiz.document_id)
+    doc = await _get_doc_user_safe(db, user.id, quiz.document_id)
     refs = get_refs(doc)
     if not doc:
         return RedirectResponse(url="/tutor", status_code=303)
     return templates.TemplateResponse("tutor/quiz_take.html", {"request": request, "quiz": quiz, "items": items, "doc": doc, "refs": refs})
 
 @router.post("/quiz/{quiz_id}/submit", response_class=HTMLResponse)
-async def quiz_submit(request: Request, quiz_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id, Quiz.owner_id == user.id).first()
+async def quiz_submit(request: Request, quiz_id: int, db: AsyncSession = Depends(get_db), user: User = Depends(get_current_user)):
+    quiz = await db.scalar(select(Quiz).where(Quiz.id == quiz_id, Quiz.owner_id == user.id))
     if not quiz:
         return RedirectResponse(url="/tutor", status_code=303)
 
@@ -363,22 +258,29 @@ async def quiz_submit(request: Request, quiz_id: int, db: Session = Depends(get_
             elif it["type"] == "mc" and ans is not None and int(ans) == int(it["answer"]):
                 correct += 1
     else:
-        doc = _get_doc_user_safe(db, user.id, quiz.document_id)
+        doc = await _get_doc_user_safe(db, user.id, quiz.document_id)
         refs = get_refs(doc)
         if not doc:
             return RedirectResponse(url="/tutor", status_code=303)
-        disc_scores = grade_discursive_batch(doc.content, items, answers)
+        queries = [" ".join([it.get("question", "")] + list(it.get("rubric", []))) for it in items if it["type"] == "disc"]
+        context = await build_context(db, doc, queries)
+        disc_scores = await grade_discursive_batch(context, items, answers)
         correct = sum(1 if s >= 0.5 else 0 for s in disc_scores)
 
     score10 = round((correct / total) * 10) if total else 0
-    attempt = QuizAttempt(
-        quiz_id=quiz_id,
-        owner_id=user.id,
-        answers_json=json.dumps(answers, ensure_ascii=False),
-        score=score10,
-        max_score=10,
-    )
-    db.add(attempt); db.commit()
+    answers_json = json.dumps(answers, ensure_ascii=False)
+
+    async def save_attempt(session: AsyncSession) -> None:
+        session.add(QuizAttempt(
+            quiz_id=quiz_id,
+            owner_id=user.id,
+            answers_json=answers_json,
+            score=score10,
+            max_score=10,
+        ))
+        await record_attempt(session, quiz_id, score10)
+
+    await write(db, save_attempt)
 
     return templates.TemplateResponse(
         "tutor/quiz_result.html",
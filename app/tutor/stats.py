@@ -0,0 +1,110 @@
+"""Estatísticas por prova mantidas incrementalmente na tabela quiz_stats.
+
+Preencher/recalcular a partir das tentativas existentes:
+    python -m app.tutor.stats backfill
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import case, func, update, insert, select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.tutor import Quiz, QuizAttempt, QuizStat
+from app.tutor.pagination import keyset_page
+
+async def quiz_stats_rows(db: AsyncSession, user_id: int, doc_id: int):
+    """Linhas (quiz_id, quiz_type, created_at, attempts, avg_score, best_score) das provas do documento."""
+    res = await db.execute(
+        select(
+            Quiz.id.label("quiz_id"),
+            Quiz.quiz_type.label("quiz_type"),
+            Quiz.created_at.label("created_at"),
+            func.coalesce(QuizStat.attempts, 0).label("attempts"),
+            case(
+                (QuizStat.attempts > 0, QuizStat.score_sum * 1.0 / QuizStat.attempts),
+                else_=0,
+            ).label("avg_score"),
+            func.coalesce(QuizStat.best_score, 0).label("best_score"),
+        )
+        .outerjoin(QuizStat, QuizStat.quiz_id == Quiz.id)
+        .where(Quiz.document_id == doc_id, Quiz.owner_id == user_id)
+        .order_by(Quiz.created_at.desc())
+    )
+    return res.all()
+
+async def attempt_rows_page(db: AsyncSession, user_id: int, doc_id: int, cursor: str | None = None):
+    """Tentativas do documento, mais recentes primeiro, paginadas por (created_at, id)."""
+    stmt = (
+        select(
+            QuizAttempt.id.label("attempt_id"),
+            QuizAttempt.created_at.label("attempt_at"),
+            QuizAttempt.score.label("score"),
+            QuizAttempt.max_score.label("max_score"),
+            Quiz.quiz_type.label("quiz_type"),
+            Quiz.id.label("quiz_id"),
+        )
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)
+        .where(Quiz.document_id == doc_id, Quiz.owner_id == user_id, QuizAttempt.owner_id == user_id)
+    )
+    return await keyset_page(db, stmt, QuizAttempt.created_at, QuizAttempt.id, cursor,
+                       settings.page_size, row_keys=("attempt_at", "attempt_id"))
+
+def init_quiz_stat(db: AsyncSession, quiz_id: int) -> None:
+    db.add(QuizStat(quiz_id=quiz_id, attempts=0, score_sum=0, best_score=0))
+
+async def record_attempt(db: AsyncSession, quiz_id: int, score: int) -> None:
+    """Soma a tentativa às estatísticas da prova na mesma transação do INSERT da
+    tentativa (quem chama faz o commit)."""
+    stmt = (
+        update(QuizStat)
+        .where(QuizStat.quiz_id == quiz_id)
+        .values(
+            attempts=QuizStat.attempts + 1,
+            score_sum=QuizStat.score_sum + score,
+            best_score=case((QuizStat.best_score < score, score), else_=QuizStat.best_score),
+            updated_at=datetime.utcnow(),
+        )
+    )
+    if (await db.execute(stmt)).rowcount:
+        return
+    # prova criada antes da tabela existir e ainda sem backfill
+    try:
+        async with db.begin_nested():
+            db.add(QuizStat(quiz_id=quiz_id, attempts=1, score_sum=score, best_score=score))
+    except IntegrityError:
+        await db.execute(stmt)
+
+def backfill(db: Session) -> int:
+    """Recalcula quiz_stats inteira a partir de quiz_attempts."""
+    db.execute(delete(QuizStat))
+    agg = (
+        select(
+            Quiz.id,
+            func.count(QuizAttempt.id),
+            func.coalesce(func.sum(QuizAttempt.score), 0),
+            func.coalesce(func.max(QuizAttempt.score), 0),
+            func.now(),
+        )
+        .select_from(Quiz)
+        .outerjoin(QuizAttempt, QuizAttempt.quiz_id == Quiz.id)
+        .group_by(Quiz.id)
+    )
+    res = db.execute(
+        insert(QuizStat).from_select(
+            ["quiz_id", "attempts", "score_sum", "best_score", "updated_at"], agg
+        )
+    )
+    db.commit()
+    return res.rowcount
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("uso: python -m app.tutor.stats backfill")
+    from app.db.session import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        print(f"quiz_stats: {backfill(db)} provas")
+    finally:
+        db.close()
@@ -1,10 +1,13 @@
 from typing import Literal, List, Dict, Any
-import json, re
+import json, re, asyncio, logging
+from app.config import settings
 from app.llm.llm_gateway import chat
 
+log = logging.getLogger(__name__)
+
 QuizType = Literal["vf", "mc", "disc"]
 
-def create_study_plan_md(text: str, horas_semanais: int = 6, semanas: int = 4) -> str:
+async def create_study_plan_md(text: str, horas_semanais: int = 6, semanas: int = 4) -> str:
     prompt = f"""Você é um tutor pedagógico. Com base no CONTEÚDO abaixo,
 gere um PLANO DE ESTUDO em Markdown para {semanas} semanas, estimando ~{horas_semanais}h/semana.
 
@@ -30,7 +33,7 @@ Formato obrigatório (apenas Markdown):
 CONTEÚDO:
 {text}
 """
-    return chat("Você monta planos de estudo objetivos e acionáveis. Responda em PT-BR.", prompt, temperature=0.3)
+    return await chat("Você monta planos de estudo objetivos e acionáveis. Responda em PT-BR.", prompt, temperature=0.3)
 
 def _json_from_llm(raw: str) -> Any:
     m = re.search(r"```(?:json)?\s*(\{[\s\S]*\}|\[[\s\S]*\])\s*```", raw, re.IGNORECASE)
@@ -39,7 +42,7 @@ def _json_from_llm(raw: str) -> Any:
     if m2: raw = m2.group(1)
     return json.loads(raw)
 
-def generate_quiz(text: str, quiz_type: QuizType, n: int = 10) -> Dict[str, Any]:
+async def generate_quiz(text: str, quiz_type: QuizType, n: int = 10) -> Dict[str, Any]:
     """Gera uma prova conforme o tipo solicitado.
     Retorna: {type, items} com estrutura apropriada para cada tipo."""
     type_desc = {
@@ -67,7 +70,7 @@ Regras:
 CONTEÚDO:
 {text}
 """
-    raw = chat("Você elabora avaliações claras e justas. Responda apenas JSON.", prompt, temperature=0.4)
+    raw = await chat("Você elabora avaliações claras e justas. Responda apenas JSON.", prompt, temperature=0.4)
     items = _json_from_llm(raw)
     out = []
     for it in items:
@@ -82,7 +85,64 @@ CONTEÚDO:
             out.append({"type":"disc","question":it.get("question","").strip(),"rubric":[str(x).strip() for x in rub][:5]})
     return {"type": quiz_type, "items": out[:n]}
 
-def grade_discursive_batch(context: str, items: List[Dict[str,Any]], answers: List[str]) -> List[float]:
+async def generate_mixed_quiz(text: str, tipos: List[QuizType], n: int = 10) -> Dict[str, Any]:
+    """Gera uma prova com um ou mais tipos, disparando uma chamada por tipo em paralelo.
+    Todas compartilham o mesmo prazo; um tipo que falhe (ou estoure o prazo) é
+    descartado e a prova sai com os itens dos demais. Se vierem menos de `n`
+    itens e ainda houver prazo, completa com mais uma chamada. Ordem dos itens =
+    ordem de `tipos`. Se a própria corrotina for cancelada, cancela as chamadas."""
+    if len(tipos) == 1:
+        plan = [(tipos[0], n)]
+    else:
+        por_tipo = max(1, n // len(tipos))
+        plan = [(t, por_tipo) for t in tipos]
+        restante = n - por_tipo * len(tipos)
+        if restante > 0:
+            plan.append((tipos[0], restante))
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.quiz_generation_timeout_seconds
+    tasks = [asyncio.create_task(generate_quiz(text, quiz_type=t, n=k)) for t, k in plan]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=settings.quiz_generation_timeout_seconds)
+        for t in pending:
+            t.cancel()
+
+        items: List[Dict[str, Any]] = []
+        delivered: List[QuizType] = []
+        for (qtype, k), task in zip(plan, tasks):
+            if task not in done or task.cancelled():
+                log.warning("generate_quiz(%s) excedeu o prazo; tipo descartado", qtype)
+                continue
+            if task.exception() is not None:
+                log.warning("generate_quiz(%s) falhou: %r", qtype, task.exception())
+                continue
+            got = task.result()["items"][:min(k, n - len(items))]
+            items.extend(got)
+            if got:
+                delivered.append(qtype)
+
+        # algum tipo devolveu menos itens que o pedido: completa com um tipo que respondeu
+        falta = n - len(items)
+        remaining = deadline - loop.time()
+        if falta > 0 and delivered and remaining > 0:
+            top_up = asyncio.create_task(generate_quiz(text, quiz_type=delivered[0], n=falta))
+            tasks.append(top_up)
+            try:
+                items.extend((await asyncio.wait_for(top_up, timeout=remaining))["items"][:falta])
+            except asyncio.TimeoutError:
+                log.warning("complemento da prova excedeu o prazo")
+            except Exception as e:
+                log.warning("complemento da prova falhou: %r", e)
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+    qtype = tipos[0] if len(tipos) == 1 else "mixed:" + ",".join(tipos)
+    return {"type": qtype, "items": items}
+
+async def grade_discursive_batch(context: str, items: List[Dict[str,Any]], answers: List[str]) -> List[float]:
     bundle = []
     for it, ans in zip(items, answers):
         bundle.append({"question": it["question"], "rubric": it.get("rubric", []), "answer": ans or ""})
@@ -99,7 +159,7 @@ ITENS+RESPOSTAS (JSON):
 SAÍDA OBRIGATÓRIA (apenas JSON):
 {{"scores":[0.0, 1.0, ...]}}
 """
-    raw = chat("Você é um corretor criterioso e objetivo. Apenas JSON.", prompt, temperature=0.0)
+    raw = await chat("Você é um corretor criterioso e objetivo. Apenas JSON.", prompt, temperature=0.0)
     try:
         data = _json_from_llm(raw)
         scores = data.get("scores", [])
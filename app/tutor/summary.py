@@ -0,0 +1,48 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.tutor import TutorDocument, DocumentSummary
+from app.llm.llm_gateway import summarize
+
+SUMMARY_BULLETS = 10
+# resumo do fallback (LLM fora do ar) é guardado sem hash e refeito após esse prazo
+DEGRADED_RETRY = timedelta(minutes=5)
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+async def _get_row(db: AsyncSession, doc_id: int) -> DocumentSummary | None:
+    return await db.scalar(select(DocumentSummary).where(DocumentSummary.document_id == doc_id))
+
+async def store_summary(db: AsyncSession, doc: TutorDocument) -> list[str]:
+    """Gera o resumo do documento e persiste junto ao hash do conteúdo. Se o
+    LLM falhou, guarda o fallback sem hash para que get_summary tente de novo."""
+    content = await doc.awaitable_attrs.content
+    bullets, degraded = await summarize(content, bullets=SUMMARY_BULLETS)
+    digest = "" if degraded else content_hash(content)
+    row = await _get_row(db, doc.id)
+    if row is None:
+        row = DocumentSummary(document_id=doc.id)
+        db.add(row)
+    row.content_hash = digest
+    row.bullets_json = json.dumps(bullets, ensure_ascii=False)
+    row.created_at = datetime.utcnow()
+    await db.commit()
+    return bullets
+
+async def get_summary(db: AsyncSession, doc: TutorDocument) -> list[str]:
+    """Lê o resumo salvo; só chama o LLM se ainda não existir, se o conteúdo mudou
+    ou se o salvo é um fallback com mais de DEGRADED_RETRY."""
+    row = await _get_row(db, doc.id)
+    if row is not None:
+        fresh = row.content_hash == content_hash(await doc.awaitable_attrs.content)
+        # fallback recente: não trava toda visualização esperando o LLM que acabou de falhar
+        retry_later = not row.content_hash and row.created_at and datetime.utcnow() - row.created_at < DEGRADED_RETRY
+        if fresh or retry_later:
+            try:
+                return json.loads(row.bullets_json)
+            except Exception:
+                pass
+    return await store_summary(db, doc)
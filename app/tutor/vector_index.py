@@ -0,0 +1,203 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+import numpy as np
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+_ID_DTYPE = np.dtype([("chunk_id", "<i8"), ("document_id", "<i8")])
+
+class EmbeddingIndex:
+    """Índice de embeddings em disco: vetores float32 normalizados num arquivo
+    contíguo lido via memmap, mais um arquivo paralelo linha -> (chunk_id, document_id).
+    Só faz append; a contagem de linhas vem do arquivo de ids, que é gravado por
+    último, então um append interrompido no meio nunca aparece nas buscas.
+    Append e remoção tomam um flock exclusivo no arquivo .lock e as leituras um
+    compartilhado, o que vale também entre workers. Os métodos bloqueiam: chame-os
+    via asyncio.to_thread. Se o arquivo de vetores estiver menor que o de ids
+    indica, o índice é descartado e o RAG o refaz a partir de embedding_json."""
+
+    def __init__(self, directory: str, name: str):
+        self.vec_path = os.path.join(directory, f"{name}.f32")
+        self.ids_path = os.path.join(directory, f"{name}.ids")
+        self.meta_path = os.path.join(directory, f"{name}.json")
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._dim: int | None = None
+        self._stamp: tuple | None = None
+        self._vectors: np.ndarray | None = None
+        self._ids: np.ndarray | None = None
+        self._read_meta()
+
+    def _read_meta(self) -> None:
+        if self._dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self._dim = int(json.load(f)["dim"])
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True):
+        """flock entre processos (e entre threads: cada open é uma descrição de
+        arquivo própria), exclusivo para escrita ou compartilhado para leitura.
+        O threading.Lock protege só o estado em memória, sempre depois do flock."""
+        with open(self.lock_path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            with self._lock:
+                self._read_meta()
+                self._load(repair=exclusive)
+                yield
+
+    def __len__(self) -> int:
+        if self._dim is None or not os.path.exists(self.ids_path):
+            return 0
+        return os.path.getsize(self.ids_path) // _ID_DTYPE.itemsize
+
+    def _file_stamp(self) -> tuple:
+        out = []
+        for path in (self.vec_path, self.ids_path):
+            try:
+                st = os.stat(path)
+                out += [st.st_ino, st.st_mtime_ns, st.st_size]
+            except FileNotFoundError:
+                out += [None, None, 0]
+        return tuple(out)
+
+    def _load(self, repair: bool) -> None:
+        """Chamado com o lock: (re)mapeia os arquivos se outro processo os alterou.
+        Índice inconsistente é apagado só com o lock exclusivo (`repair`); com o
+        compartilhado, aparece vazio até a próxima escrita."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        rows = len(self)
+        if rows and stamp[2] < rows * self._dim * 4:
+            log.warning("índice %s inconsistente (%d linhas, %d bytes de vetores); descartando",
+                        self.ids_path, rows, stamp[2])
+            if repair:
+                for path in (self.vec_path, self.ids_path):
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                stamp = self._file_stamp()
+            else:
+                stamp = None
+            rows = 0
+        if rows == 0:
+            self._vectors = np.empty((0, self._dim or 0), dtype=np.float32)
+            self._ids = np.empty(0, dtype=_ID_DTYPE)
+        else:
+            self._vectors = np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+            self._ids = np.memmap(self.ids_path, dtype=_ID_DTYPE, mode="r", shape=(rows,))
+        self._stamp = stamp
+
+    def append(self, chunk_ids: Sequence[int], document_ids: Sequence[int], vectors: Sequence[Sequence[float]]) -> None:
+        if not len(chunk_ids):
+            return
+        with self._locked():
+            self._append(chunk_ids, document_ids, vectors)
+
+    def _append(self, chunk_ids: Sequence[int], document_ids: Sequence[int], vectors: Sequence[Sequence[float]]) -> None:
+        """Chamado com o lock exclusivo."""
+        mat = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        mat /= np.where(norms == 0, 1.0, norms)
+        ids = np.empty(len(chunk_ids), dtype=_ID_DTYPE)
+        ids["chunk_id"] = chunk_ids
+        ids["document_id"] = document_ids
+        if self._dim is None:
+            self._dim = int(mat.shape[1])
+            tmp = self.meta_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"dim": self._dim}, f)
+            os.replace(tmp, self.meta_path)
+        elif mat.shape[1] != self._dim:
+            raise ValueError(f"dimensão {mat.shape[1]} difere do índice ({self._dim})")
+        rows = len(self._ids) if self._ids is not None else 0
+        with open(self.vec_path, "r+b" if os.path.exists(self.vec_path) else "wb") as f:
+            f.truncate(rows * self._dim * 4)
+            f.seek(0, os.SEEK_END)
+            f.write(mat.tobytes())
+        with open(self.ids_path, "ab") as f:
+            f.write(ids.tobytes())
+
+    def ensure_document(self, document_id: int, chunk_ids: Sequence[int],
+                        vectors: Callable[[], Sequence[Sequence[float]]]) -> bool:
+        """Indexa o documento se ele ainda não estiver no índice, numa única seção
+        exclusiva (dois workers não duplicam as linhas). `vectors` só é chamado
+        se for preciso gravar. Devolve True se gravou."""
+        with self._locked(exclusive=False):
+            if self._contains(document_id):
+                return False
+        if not len(chunk_ids):
+            return False
+        with self._locked():
+            if self._contains(document_id):
+                return False
+            self._append(chunk_ids, [document_id] * len(chunk_ids), vectors())
+            return True
+
+    def drop_document(self, document_id: int) -> None:
+        """Remove as linhas de um documento (reescreve os arquivos)."""
+        with self._locked():
+            if self._ids is None or not len(self._ids):
+                return
+            keep = self._ids["document_id"] != document_id
+            if keep.all():
+                return
+            vectors = np.array(self._vectors[keep])
+            ids = np.array(self._ids[keep])
+            self._vectors = self._ids = None
+            self._stamp = None
+            for path, arr in ((self.vec_path, vectors), (self.ids_path, ids)):
+                tmp = path + ".tmp"
+                arr.tofile(tmp)
+                os.replace(tmp, path)
+
+    def _contains(self, document_id: int) -> bool:
+        return bool(len(self._ids)) and bool((self._ids["document_id"] == document_id).any())
+
+    def has_document(self, document_id: int) -> bool:
+        with self._locked(exclusive=False):
+            return self._contains(document_id)
+
+    def search(self, query: Sequence[float], k: int, document_id: int | None = None) -> List[Tuple[int, float]]:
+        """Top-k por similaridade de cosseno: um único produto matriz-vetor sobre o memmap."""
+        with self._locked(exclusive=False):
+            vectors, ids = self._vectors, self._ids
+        if vectors is None or not len(ids):
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        if document_id is not None:
+            rows = np.flatnonzero(ids["document_id"] == document_id)
+            if not len(rows):
+                return []
+            # as linhas de um documento são contíguas: fatia em vez de copiar linha a linha
+            if rows[-1] - rows[0] + 1 == len(rows):
+                vectors, ids = vectors[rows[0]:rows[-1] + 1], ids[rows[0]:rows[-1] + 1]
+            else:
+                vectors, ids = vectors[rows], ids[rows]
+        scores = vectors @ (q / norm)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids["chunk_id"][i]), float(scores[i])) for i in top]
+
+_indexes: Dict[int, EmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_user_index(user_id: int) -> EmbeddingIndex:
+    with _indexes_lock:
+        idx = _indexes.get(user_id)
+        if idx is None:
+            idx = EmbeddingIndex(settings.vector_index_dir, f"user_{user_id}")
+            _indexes[user_id] = idx
+        return idx
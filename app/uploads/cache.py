@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import IO
+from app.config import settings
+from app.metrics.registry import EXTRACT_CACHE_BYTES, EXTRACT_CACHE_REQUESTS
+
+class ExtractCache:
+    """Cache em disco do texto extraído de PDFs, endereçado pelo SHA-256 dos bytes
+    do arquivo. A ordem LRU fica num índice em memória (montado pelo mtime na
+    inicialização, e o mtime é renovado a cada acerto para sobreviver a
+    reinícios). Ao passar de `max_bytes`, remove os menos usados até a marca de
+    `low_water`, para que o próximo put não dispare outra remoção.
+
+    O índice é por processo: cada worker vê o que havia no diretório ao subir
+    mais o que ele próprio gravou. Com N workers no mesmo diretório o disco pode
+    chegar a N × EXTRACT_CACHE_MAX_MB antes de algum deles remover arquivos."""
+
+    def __init__(self, directory: str, max_bytes: int, low_water: float = 0.9):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_water_bytes = int(max_bytes * low_water)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # caminho -> tamanho, do menos para o mais recentemente usado
+        self._index: OrderedDict[str, int] = OrderedDict(
+            (p, size) for p, size, _ in sorted(self._entries(), key=lambda e: e[2])
+        )
+        self._bytes = sum(self._index.values())
+        EXTRACT_CACHE_BYTES.set(self._bytes)
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, sha256[:2], f"{sha256}.txt")
+
+    def _entries(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".txt"):
+                    continue
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except FileNotFoundError:
+                    continue
+                yield p, st.st_size, st.st_mtime
+
+    def open(self, sha256: str) -> IO[str] | None:
+        """Abre o texto em cache (modo texto) ou devolve None num miss."""
+        p = self._path(sha256)
+        try:
+            f = open(p, encoding="utf-8")
+        except FileNotFoundError:
+            EXTRACT_CACHE_REQUESTS.labels("miss").inc()
+            with self._lock:
+                # removido por outro worker
+                self._bytes -= self._index.pop(p, 0)
+                EXTRACT_CACHE_BYTES.set(self._bytes)
+            return None
+        try:
+            os.utime(p)
+        except OSError:
+            pass
+        EXTRACT_CACHE_REQUESTS.labels("hit").inc()
+        with self._lock:
+            if p in self._index:
+                self._index.move_to_end(p)
+        return f
+
+    def put(self, sha256: str, src: IO[str]) -> None:
+        """Grava o conteúdo de `src` (copiado em blocos) sob a chave `sha256`."""
+        p = self._path(sha256)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(p), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as out:
+                shutil.copyfileobj(src, out)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, p)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._bytes += size - self._index.pop(p, 0)
+            self._index[p] = size
+            EXTRACT_CACHE_BYTES.set(self._bytes)
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove os menos usados até `low_water_bytes`, sem varrer o diretório."""
+        victims = []
+        with self._lock:
+            while self._index and self._bytes > self.low_water_bytes:
+                p, size = self._index.popitem(last=False)
+                self._bytes -= size
+                victims.append(p)
+            EXTRACT_CACHE_BYTES.set(self._bytes)
+        for p in victims:
+            try:
+                os.unlink(p)
+            except FileNotFoundError:
+                pass
+
+_cache: ExtractCache | None = None
+
+def get_extract_cache() -> ExtractCache:
+    global _cache
+    if _cache is None:
+        _cache = ExtractCache(settings.extract_cache_dir, settings.extract_cache_max_mb * 1024 * 1024)
+    return _cache
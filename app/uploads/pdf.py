@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Iterator, List
+from app.config import settings
+from app.uploads.cache import get_extract_cache
+from app.uploads.spool import SpooledUpload
+
+_pool: ProcessPoolExecutor | None = None
+
+class PdfExtractTimeout(Exception):
+    pass
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool de processos dedicado ao pdfminer (CPU-bound), fora do event loop e do GIL."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _kill_pool(pool: ProcessPoolExecutor) -> None:
+    """Derruba o pool à força: future de processo já iniciado não se cancela, e o
+    pdfminer seguiria ocupando o slot. O próximo _get_pool cria outro."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    procs = list((pool._processes or {}).values())
+    # sem cancel_futures: os pedidos de outros uploads na fila recebem
+    # BrokenProcessPool (e tentam de novo) em vez de um cancelamento
+    pool.shutdown(wait=False)
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+
+def _count_pages(path: str) -> int:
+    from pdfminer.pdfpage import PDFPage
+    with open(path, "rb") as f:
+        return sum(1 for _ in PDFPage.get_pages(f, check_extractable=False))
+
+def _extract_range(path: str, first: int, last: int, out_path: str) -> None:
+    """Roda no processo filho: escreve o texto das páginas [first, last) em out_path,
+    página a página, sem montar a string inteira em memória."""
+    from pdfminer.high_level import extract_text_to_fp
+    from pdfminer.layout import LAParams
+    with open(path, "rb") as src, open(out_path, "wb") as out:
+        extract_text_to_fp(src, out, page_numbers=range(first, last), laparams=LAParams(), codec="utf-8")
+
+@asynccontextmanager
+async def extracted_parts(path: str) -> AsyncIterator[List[str]]:
+    """Extrai o PDF em `path` no pool de processos. PDFs grandes são divididos em
+    faixas de páginas extraídas em paralelo; o arquivo inteiro tem um prazo único.
+    Entrega os arquivos de texto de cada faixa, em ordem, e os apaga na saída."""
+    loop = asyncio.get_running_loop()
+    workdir = tempfile.mkdtemp(prefix="pdftext-")
+    pool = _get_pool()
+
+    async def _extract(pool: ProcessPoolExecutor) -> List[str]:
+        pages = await loop.run_in_executor(pool, _count_pages, path)
+        step = max(1, settings.pdf_pages_per_task)
+        ranges = [(i, min(i + step, pages)) for i in range(0, pages, step)]
+        outs = [os.path.join(workdir, f"{n:05d}.txt") for n in range(len(ranges))]
+        await asyncio.gather(*(loop.run_in_executor(pool, _extract_range, path, a, b, out)
+                               for (a, b), out in zip(ranges, outs)))
+        return outs
+
+    async def _run() -> List[str]:
+        nonlocal pool
+        try:
+            return await _extract(pool)
+        except BrokenProcessPool:
+            # o pool caiu por causa de outro upload que estourou o prazo: tenta de novo num novo
+            pool = _get_pool()
+            return await _extract(pool)
+
+    try:
+        try:
+            outs = await asyncio.wait_for(_run(), timeout=settings.pdf_extract_timeout_seconds)
+        except asyncio.TimeoutError:
+            # só remove workdir depois que os filhos que escreviam nele morreram
+            await asyncio.to_thread(_kill_pool, pool)
+            raise PdfExtractTimeout(f"extração excedeu {settings.pdf_extract_timeout_seconds:.0f}s")
+        yield outs
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def iter_parts(parts: List[str]) -> Iterator[str]:
+    for p in parts:
+        with open(p, encoding="utf-8", errors="ignore") as f:
+            yield f.read()
+
+
+def clean_pdf_text(s: str) -> str:
+    s = s.replace("\x0c", "\n").replace("\r", " ")
+    s = re.sub(r"[ \t]+", " ", s)
+    s = re.sub(r"\n{3,}", "\n\n", s)
+    return s.strip()
+
+async def extract_cleaned(upload: SpooledUpload) -> SpooledTemporaryFile:
+    """Texto limpo do PDF num spool (vai a disco se crescer), posicionado no início.
+    Consulta antes o cache por SHA-256; num miss, extrai e limpa faixa a faixa e
+    grava o resultado no cache."""
+    cache = get_extract_cache()
+    out = SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", encoding="utf-8")
+    try:
+        cached = cache.open(upload.sha256)
+        if cached is not None:
+            with cached:
+                shutil.copyfileobj(cached, out)
+            out.seek(0)
+            return out
+        async with extracted_parts(upload.path) as parts:
+            for raw in iter_parts(parts):
+                cleaned = clean_pdf_text(raw)
+                if cleaned:
+                    if out.tell():
+                        out.write("\n\n")
+                    out.write(cleaned)
+        out.seek(0)
+        # cópia para o cache e eventual remoção de antigos fora do event loop
+        await asyncio.to_thread(cache.put, upload.sha256, out)
+        out.seek(0)
+    except BaseException:
+        out.close()
+        raise
+    return out
@@ -1,85 +1,61 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.auth.deps import get_db, get_current_user
-from pdfminer.high_level import extract_text
-import io, re
-from app.models.tutor import TutorDocument
-from app.models.user import User
-import json
-
-
-router = APIRouter(prefix="/upload", tags=["upload"])
-
-MAX_MB = 10
-
-def _clean_pdf_text(raw: str) -> str:
-    if not raw:
-        return ""
-
-    raw = re.sub(r"^\s*---\s*\[PDF:[^\]]+\]\s*---\s*$", "", raw, flags=re.IGNORECASE | re.MULTILINE)
-    raw = raw.replace("\x0c", "\n\n")
-    raw = raw.replace("\r\n", "\n").replace("\r", "\n")
-    raw = re.sub(r"\n{3,}", "\n\n", raw)
-    raw = re.sub(r"[ \t]{2,}", " ", raw)
-    raw = "\n".join(line.strip() for line in raw.split("\n"))
-
-    return raw.strip()
-
-# app/uploads/routes.py
 from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth.deps import get_db, get_current_user
-from app.models.tutor import TutorDocument
-import io, json
-from pdfminer.high_level import extract_text
+from app.uploads.pdf import extract_cleaned, PdfExtractTimeout
+from app.uploads.spool import spool_upload, SpooledUpload, UploadTooLarge
+from tempfile import SpooledTemporaryFile
+import asyncio
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
 MAX_MB = 10
 
-def _clean_pdf_text(s: str) -> str:
-    import re
-    s = s.replace("\x0c", "\n").replace("\r", " ")
-    s = re.sub(r"[ \t]+", " ", s)
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    return s.strip()
-
 @router.post("/pdf-multi")
 async def upload_pdf_multi(
     files: list[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user = Depends(get_current_user),
 ):
     if not files:
         raise HTTPException(status_code=400, detail="Nenhum arquivo PDF recebido.")
 
-    merged_chunks: list[str] = []
+    merged: list[SpooledTemporaryFile] = []
     sources: list[str] = []
-    count = 0
-
-    for f in files:
-        if f.content_type != "application/pdf":
-            raise HTTPException(status_code=400, detail=f"Arquivo '{f.filename}' não é PDF.")
-
-        data = await f.read()
-        if len(data) > MAX_MB * 1024 * 1024:
-            raise HTTPException(status_code=413, detail=f"{f.filename} maior que {MAX_MB}MB.")
-
-        try:
-            raw = extract_text(io.BytesIO(data)) or ""
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Falha ao extrair texto de {f.filename}: {e}")
-
-        cleaned = _clean_pdf_text(raw)
-        if cleaned:
-            merged_chunks.append(cleaned)
-            sources.append(f.filename or "sem_nome.pdf")
-            count += 1
-
-    if not merged_chunks:
-        raise HTTPException(status_code=422, detail="Nenhum texto pôde ser extraído.")
-
-    full_text = "\n\n".join(merged_chunks)
+    spooled: list[SpooledUpload] = []
+    results: list = []
+
+    try:
+        for f in files:
+            if f.content_type != "application/pdf":
+                raise HTTPException(status_code=400, detail=f"Arquivo '{f.filename}' não é PDF.")
+            try:
+                spooled.append(await spool_upload(f, MAX_MB * 1024 * 1024))
+            except UploadTooLarge:
+                raise HTTPException(status_code=413, detail=f"{f.filename} maior que {MAX_MB}MB.")
+
+        results = await asyncio.gather(*(extract_cleaned(sp) for sp in spooled), return_exceptions=True)
+
+        for f, out in zip(files, results):
+            if isinstance(out, PdfExtractTimeout):
+                raise HTTPException(status_code=422, detail=f"Tempo esgotado ao extrair texto de {f.filename}.")
+            if isinstance(out, Exception):
+                raise HTTPException(status_code=422, detail=f"Falha ao extrair texto de {f.filename}: {out}")
+            if out.read(1):
+                out.seek(0)
+                merged.append(out)
+                sources.append(f.filename or "sem_nome.pdf")
+
+        if not merged:
+            raise HTTPException(status_code=422, detail="Nenhum texto pôde ser extraído.")
+
+        full_text = "\n\n".join(out.read() for out in merged)
+    finally:
+        for sp in spooled:
+            sp.discard()
+        for out in results:
+            if not isinstance(out, BaseException):
+                out.close()
+    count = len(merged)
 
     return {
         "ok": True,
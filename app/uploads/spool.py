@@ -0,0 +1,44 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from fastapi import UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+class UploadTooLarge(Exception):
+    pass
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+async def spool_upload(file: UploadFile, max_bytes: int, suffix: str = ".pdf") -> SpooledUpload:
+    """Copia o upload para um arquivo temporário em blocos, calculando o SHA-256
+    no caminho e abortando assim que `max_bytes` é ultrapassado."""
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="upload-")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = await file.read(CHUNK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise UploadTooLarge(file.filename or "arquivo")
+                h.update(block)
+                out.write(block)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SpooledUpload(path=path, size=size, sha256=h.hexdigest())
@@ -1,10 +1,22 @@
 
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt_sha256", "bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256", "bcrypt"],
+    deprecated="auto",
+    bcrypt_sha256__rounds=settings.bcrypt_rounds,
+    bcrypt__rounds=settings.bcrypt_rounds,
+)
+
+_pool: ProcessPoolExecutor | None = None
+_pending = 0
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -12,6 +24,44 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool de processos só para bcrypt, para não esgotar o threadpool do AnyIO."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def _offload(fn, *args):
+    """Executa fn no pool. Com a fila cheia responde 503 + Retry-After em vez de
+    acumular logins esperando (backpressure)."""
+    global _pending
+    if _pending >= settings.password_hash_max_pending:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente em instantes.",
+            headers={"Retry-After": str(settings.password_hash_retry_after_seconds)},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _offload(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _offload(verify_password, password, hashed)
+
 def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes or settings.access_token_expire_minutes)
     to_encode = {"sub": subject, "exp": expire}
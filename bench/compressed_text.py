@@ -0,0 +1,85 @@
+"""Tamanho do banco e latência de leitura: Text puro vs CompressedText.
+
+Uso: python -m bench.compressed_text [--docs 500] [--chars 60000] [--reads 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, select
+from app.config import settings
+from app.db.types import CompressedText, zstandard
+
+WORDS = (
+    "banco dados relacional tabela linha coluna chave primária estrangeira índice consulta "
+    "transação isolamento normalização forma normal dependência funcional junção seleção "
+    "projeção álgebra cálculo modelo entidade relacionamento atributo cardinalidade restrição "
+    "integridade esquema instância visão gatilho procedimento otimizador plano custo página"
+).split()
+
+
+def _fake_pdf_text(rnd: random.Random, chars: int) -> str:
+    out, size = [], 0
+    while size < chars:
+        sentence = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 20))).capitalize() + "."
+        if rnd.random() < 0.05:
+            sentence += f"\n\n{rnd.randint(1, 300)}\n\n"
+        out.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(out)
+
+
+def _run(label: str, coltype, texts: list[str], reads: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    meta = MetaData()
+    docs = Table("docs", meta, Column("id", Integer, primary_key=True), Column("content", coltype))
+    meta.create_all(engine)
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(docs.insert(), [{"id": i + 1, "content": t} for i, t in enumerate(texts)])
+    write_s = time.perf_counter() - t0
+
+    rnd = random.Random(7)
+    lat = []
+    with engine.connect() as conn:
+        for _ in range(reads):
+            doc_id = rnd.randint(1, len(texts))
+            t0 = time.perf_counter()
+            conn.execute(select(docs.c.content).where(docs.c.id == doc_id)).scalar_one()
+            lat.append((time.perf_counter() - t0) * 1000)
+    engine.dispose()
+
+    size_mb = os.path.getsize(path) / 1e6
+    os.remove(path)
+    lat.sort()
+    p50 = statistics.median(lat)
+    p99 = lat[int(len(lat) * 0.99) - 1]
+    print(f"{label:<10}{size_mb:>10.1f}{write_s:>12.2f}{p50:>10.3f}{p99:>10.3f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=500)
+    ap.add_argument("--chars", type=int, default=60000)
+    ap.add_argument("--reads", type=int, default=2000)
+    args = ap.parse_args()
+
+    rnd = random.Random(42)
+    texts = [_fake_pdf_text(rnd, args.chars) for _ in range(args.docs)]
+    print(f"{args.docs} documentos de ~{args.chars} caracteres, {args.reads} leituras aleatórias")
+    print(f"{'coluna':<10}{'MB':>10}{'escrita s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+
+    _run("text", Text, texts, args.reads)
+    codecs = ["zlib"] + (["zstd"] if zstandard is not None else [])
+    for codec in codecs:
+        settings.text_compression = codec
+        _run(codec, CompressedText, texts, args.reads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Teste de carga ponta a ponta: cadastro → upload → documento → prova → correção.
+
+Cada fluxo é um usuário novo passando por todas as etapas. Os fluxos chegam em
+laço aberto na taxa --rps (um a cada 1/rps segundos, sem esperar os anteriores),
+então a fila aparece na latência em vez de reduzir a carga. No fim, imprime
+p50/p95/p99 de cada etapa e do fluxo inteiro.
+
+Uso, com o mock da OpenAI para não gastar créditos:
+    python -m bench.mock_openai --port 9100 --median-ms 800 &
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=mock uvicorn app.main:app --port 8000 &
+    python -m bench.loadgen --base-url http://127.0.0.1:8000 --rps 2 --duration 60 [--json out.json]
+
+A etapa quiz_job mede do enfileiramento até o job terminar (polling de
+/jobs/{id}/status). O cadastro inclui o bcrypt, que costuma dominar a CPU.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import defaultdict
+import httpx
+
+STEPS = ("register", "upload", "doc_detail", "quiz_create", "quiz_job", "quiz_take", "quiz_submit")
+
+WORDS = (
+    "banco dados relacional tabela linha coluna chave primária estrangeira índice consulta "
+    "transação isolamento normalização dependência funcional junção seleção projeção álgebra "
+    "modelo entidade relacionamento atributo cardinalidade restrição integridade esquema visão"
+).split()
+
+
+class StepError(Exception):
+    pass
+
+
+class Stats:
+    def __init__(self):
+        self.latency: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.started = 0
+        self.completed = 0
+        self.elapsed = 0.0
+
+    def ok(self, step: str, seconds: float) -> None:
+        self.latency[step].append(seconds)
+
+    def fail(self, step: str, reason: str) -> None:
+        self.errors[step][reason] += 1
+
+
+def _prose(chars: int, rnd: random.Random) -> str:
+    out, size = [], 0
+    while size < chars:
+        s = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 18))).capitalize() + "."
+        out.append(s)
+        size += len(s) + 1
+    return " ".join(out)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentil pelo posto mais próximo."""
+    if not values:
+        return float("nan")
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, round(p / 100 * len(s) + 0.5) - 1))]
+
+
+async def _timed(stats: Stats, step: str, call, expect: tuple[int, ...]) -> httpx.Response:
+    t0 = time.perf_counter()
+    try:
+        r = await call
+    except httpx.HTTPError as e:
+        stats.fail(step, type(e).__name__)
+        raise StepError(step) from e
+    if r.status_code not in expect:
+        stats.fail(step, str(r.status_code))
+        raise StepError(step)
+    stats.ok(step, time.perf_counter() - t0)
+    return r
+
+
+async def flow(args, stats: Stats, seed: int) -> None:
+    rnd = random.Random(seed)
+    stats.started += 1
+    t0 = time.perf_counter()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, follow_redirects=False) as c:
+        try:
+            email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+            await _timed(stats, "register", c.post("/auth/register", json={
+                "name": "Carga", "email": email, "password": "carga123"}), (200, 201))
+
+            r = await _timed(stats, "upload", c.post("/tutor/upload", data={
+                "title": f"Doc {seed}", "text": _prose(args.doc_chars, rnd), "sources": "[]"}), (303,))
+            doc_url = r.headers["location"]
+            doc_id = doc_url.rstrip("/").rsplit("/", 1)[1]
+
+            await _timed(stats, "doc_detail", c.get(doc_url), (200,))
+
+            r = await _timed(stats, "quiz_create", c.post(f"/tutor/doc/{doc_id}/quiz/create", data={
+                "n": args.items, "tipos": args.tipos}), (303,))
+            job_id = r.headers["location"].rstrip("/").rsplit("/", 1)[1]
+
+            j0 = time.perf_counter()
+            deadline = j0 + args.job_timeout
+            while True:
+                try:
+                    st = (await c.get(f"/jobs/{job_id}/status")).json()
+                except (httpx.HTTPError, ValueError) as e:
+                    stats.fail("quiz_job", type(e).__name__)
+                    raise StepError("quiz_job") from e
+                if st["status"] == "done":
+                    break
+                if st["status"] == "failed" or time.perf_counter() > deadline:
+                    stats.fail("quiz_job", st["status"] if st["status"] == "failed" else "timeout")
+                    raise StepError("quiz_job")
+                await asyncio.sleep(args.poll)
+            stats.ok("quiz_job", time.perf_counter() - j0)
+
+            quiz_url = st["result_url"]
+            r = await _timed(stats, "quiz_take", c.get(quiz_url), (200,))
+            fields = sorted({int(i) for i in re.findall(r'name="q_(\d+)"', r.text)})
+            answers = {f"q_{i}": rnd.choice(["true", "false", "0", "1", "2", "3", "resposta de teste"]) for i in fields}
+            await _timed(stats, "quiz_submit", c.post(f"{quiz_url}/submit", data=answers), (200,))
+        except StepError:
+            return
+        stats.ok("flow", time.perf_counter() - t0)
+        stats.completed += 1
+
+
+async def run(args) -> Stats:
+    stats = Stats()
+    tasks = []
+    interval = 1 / args.rps
+    start = time.perf_counter()
+    i = 0
+    while time.perf_counter() - start < args.duration:
+        tasks.append(asyncio.create_task(flow(args, stats, args.seed + i)))
+        i += 1
+        # agenda pela grade absoluta para não acumular atraso
+        await asyncio.sleep(max(0.0, start + i * interval - time.perf_counter()))
+    await asyncio.gather(*tasks)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def report(stats: Stats) -> dict:
+    out = {"started": stats.started, "completed": stats.completed, "elapsed_s": round(stats.elapsed, 2), "steps": {}}
+    print(f"fluxos: {stats.started} iniciados, {stats.completed} completos em {stats.elapsed:.1f}s")
+    print(f"{'etapa':<14}{'n':>6}{'erros':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for step in STEPS + ("flow",):
+        lat = stats.latency.get(step, [])
+        errs = dict(stats.errors.get(step, {}))
+        p = {f"p{q}": percentile(lat, q) for q in (50, 95, 99)}
+        out["steps"][step] = {"n": len(lat), "errors": errs, **{k: round(v, 4) if lat else None for k, v in p.items()}}
+        print(f"{step:<14}{len(lat):>6}{sum(errs.values()):>7}"
+              + "".join(f"{v * 1000:>8.0f}ms" for v in p.values()))
+    for step, errs in stats.errors.items():
+        print(f"  {step}: " + ", ".join(f"{k}×{v}" for k, v in errs.items()))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--rps", type=float, default=1.0, help="fluxos iniciados por segundo")
+    ap.add_argument("--duration", type=float, default=30.0, help="segundos iniciando fluxos")
+    ap.add_argument("--doc-chars", type=int, default=20000)
+    ap.add_argument("--items", type=int, default=6)
+    ap.add_argument("--tipos", default="vf,mc", help="tipos da prova (vf, mc, disc); disc inclui correção pelo LLM")
+    ap.add_argument("--poll", type=float, default=0.25)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--job-timeout", type=float, default=180.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json")
+    args = ap.parse_args()
+    args.tipos = [t for t in args.tipos.split(",") if t]
+
+    stats = asyncio.run(run(args))
+    out = report(stats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    if stats.completed < stats.started:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
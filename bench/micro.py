@@ -0,0 +1,219 @@
+"""Micro-benchmarks dos caminhos quentes de CPU, sem rede nem banco.
+
+Uso:
+    python -m bench.micro                                   # só mede
+    python -m bench.micro --save bench/baselines/micro.json  # grava baseline
+    python -m bench.micro --compare bench/baselines/micro.json [--threshold 0.20]
+    python -m bench.micro -k clean                          # só casos com "clean" no nome
+
+--compare sai com código 1 se algum caso ficar mais lento que a baseline além
+do limite. Compara o tempo mínimo das repetições, que varia bem menos que a
+mediana com ruído da máquina. Baselines só são comparáveis na mesma máquina:
+regrave ao trocar de máquina de referência.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+WORDS = (
+    "banco dados relacional tabela linha coluna chave primária estrangeira índice consulta "
+    "transação isolamento normalização dependência funcional junção seleção projeção álgebra "
+    "modelo entidade relacionamento atributo cardinalidade restrição integridade esquema visão"
+).split()
+
+
+def case(name: str):
+    """Registra um caso: a função faz o setup e devolve o callable medido."""
+    def deco(setup):
+        CASES[name] = setup
+        return setup
+    return deco
+
+
+def _prose(chars: int, seed: int = 42) -> str:
+    rnd = random.Random(seed)
+    out, size = [], 0
+    while size < chars:
+        s = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 18))).capitalize() + "."
+        out.append(s)
+        size += len(s) + 1
+    return " ".join(out)
+
+
+def _pdf_like(chars: int) -> str:
+    """Texto com a sujeira típica do pdfminer: quebras de página, espaços e linhas em branco."""
+    rnd = random.Random(7)
+    lines = []
+    for i, sent in enumerate(_prose(chars).split(". ")):
+        lines.append(sent + ("." if rnd.random() < 0.7 else "") + " " * rnd.randint(0, 4))
+        if i % 40 == 39:
+            lines.extend(["", "", "", f"{i // 40 + 1}", "\x0c"])
+        elif rnd.random() < 0.1:
+            lines.append("\t  ")
+    return "\r\n".join(lines)
+
+
+@case("clean_pdf_text/1MB")
+def _clean_pdf_text():
+    from app.uploads.pdf import clean_pdf_text
+    text = _pdf_like(1_000_000)
+    return lambda: clean_pdf_text(text)
+
+
+@case("tutor._clean_text/1MB")
+def _tutor_clean_text():
+    from app.tutor.routes import _clean_text
+    text = _pdf_like(1_000_000)
+    return lambda: _clean_text(text)
+
+
+@case("pdfminer/20 páginas")
+def _pdfminer():
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from app.uploads.pdf import _extract_range
+    tmp = tempfile.mkdtemp(prefix="bench-pdf-")
+    path, out = os.path.join(tmp, "in.pdf"), os.path.join(tmp, "out.txt")
+    c = canvas.Canvas(path, pagesize=A4)
+    sents = _prose(20 * 3000).split(". ")
+    for page in range(20):
+        y = 800
+        for sent in sents[page * 40:(page + 1) * 40]:
+            c.drawString(40, y, sent[:95])
+            y -= 18
+        c.showPage()
+    c.save()
+    return lambda: _extract_range(path, 0, 20, out)
+
+
+def _quiz_items(n: int) -> list:
+    rnd = random.Random(3)
+    return [{"type": "mc", "question": _prose(200, seed=i), "options": [_prose(40, seed=i + j) for j in range(4)],
+             "answer": rnd.randrange(4), "explain": _prose(150, seed=-i)} for i in range(n)]
+
+
+@case("_json_from_llm/fenced 200 itens")
+def _json_fenced():
+    from app.tutor.study import _json_from_llm
+    raw = "Claro! Aqui está a prova:\n\n```json\n" + json.dumps(_quiz_items(200), ensure_ascii=False, indent=2) + "\n```\nBons estudos!"
+    return lambda: _json_from_llm(raw)
+
+
+@case("_json_from_llm/sem fence 200 itens")
+def _json_messy():
+    from app.tutor.study import _json_from_llm
+    raw = _prose(3000) + "\n" + json.dumps(_quiz_items(200), ensure_ascii=False) + "\n" + _prose(3000, seed=9)
+    return lambda: _json_from_llm(raw)
+
+
+@case("_naive_summary/1MB")
+def _naive():
+    from app.llm.llm_gateway import _naive_summary
+    text = _pdf_like(1_000_000)
+    return lambda: _naive_summary(text, 10)
+
+
+@case("RateLimitMiddleware/1000 req, 20k chaves")
+def _ratelimit():
+    from app.middleware.ratelimit import InMemoryBackend, RateLimitMiddleware, make_key_func
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    mw = RateLimitMiddleware(app, window_seconds=60, max_calls=30, key_func=make_key_func("x"),
+                             include_path_prefixes=("/upload",), backend=InMemoryBackend())
+    rnd = random.Random(1)
+    ips = [f"10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(20000)]
+    scopes = [{"type": "http", "method": "POST", "path": "/upload/pdf-multi", "headers": [],
+               "query_string": b"", "client": (rnd.choice(ips), 1234)} for _ in range(1000)]
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def batch():
+        for scope in scopes:
+            await mw(scope, receive, send)
+
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(batch())
+
+
+@case("markdown/plano de estudo")
+def _markdown():
+    import markdown
+    rnd = random.Random(5)
+    parts = ["# Objetivos de aprendizagem"] + [f"- {_prose(80, seed=i)}" for i in range(10)]
+    for week in range(1, 9):
+        parts += [f"## Semana {week}", "| Dia | Tema | Horas |", "|---|---|---|"]
+        parts += [f"| {d} | {_prose(40, seed=week * 10 + d)} | {rnd.randint(1, 3)} |" for d in range(1, 6)]
+        parts += [f"1. {_prose(120, seed=week * 100 + i)}" for i in range(6)]
+        parts += ["```sql", "SELECT a.id, b.nome FROM a JOIN b ON b.a_id = a.id WHERE a.x > 10;", "```"]
+    md = "\n".join(parts)
+    return lambda: markdown.markdown(md, extensions=["fenced_code", "tables", "toc", "nl2br", "codehilite"])
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "number": number, "repeat": repeat}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-k", default="", help="roda só casos cujo nome contém o texto")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--save")
+    ap.add_argument("--compare")
+    ap.add_argument("--threshold", type=float, default=0.20, help="piora relativa tolerada no tempo mínimo")
+    args = ap.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    results, regressions = {}, []
+    print(f"{'caso':<42}{'mediana':>12}{'mínimo':>12}{'vs base':>10}")
+    for name, setup in CASES.items():
+        if args.k not in name:
+            continue
+        r = results[name] = measure(setup(), args.repeat)
+        delta = ""
+        if name in baseline:
+            ratio = r["min_s"] / baseline[name]["min_s"] - 1
+            delta = f"{ratio:+.1%}"
+            if ratio > args.threshold:
+                regressions.append(name)
+                delta += " !"
+        print(f"{name:<42}{r['median_s'] * 1000:>10.3f}ms{r['min_s'] * 1000:>10.3f}ms{delta:>10}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        meta = {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"baseline gravada em {args.save}")
+
+    if regressions:
+        print(f"regressões acima de {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
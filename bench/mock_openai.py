@@ -0,0 +1,228 @@
+"""Servidor local compatível com a API da OpenAI, para testes de carga sem gastar créditos.
+
+Implementa /chat/completions, /responses e /embeddings (também sob /v1). As
+respostas são geradas a partir do prompt: provas em JSON no formato que
+generate_quiz espera, notas para a correção discursiva, plano de estudo em
+markdown e resumos em tópicos.
+
+Uso:
+    python -m bench.mock_openai --port 9100 --median-ms 800 --sigma 0.5 --error-rate 0.02
+e suba a aplicação com OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_KEY=mock.
+
+Latência: lognormal com a mediana e o sigma dados (--sigma 0 = fixa). Os
+embeddings usam --embed-median-ms. Erros: com probabilidade --error-rate a
+resposta é um dos status de --error-status, com corpo de erro da OpenAI.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class MockConfig:
+    median_ms: float = 800
+    sigma: float = 0.5
+    embed_median_ms: float = 120
+    error_rate: float = 0.0
+    error_status: tuple[int, ...] = (500, 429)
+    embed_dim: int = 1536
+    seed: int | None = None
+
+
+WORDS = (
+    "conceito definição exemplo tabela chave consulta índice transação modelo relação atributo "
+    "restrição integridade normalização dependência junção álgebra esquema visão desempenho"
+).split()
+
+
+class MockBackend:
+    def __init__(self, cfg: MockConfig):
+        self.cfg = cfg
+        self.rnd = random.Random(cfg.seed)
+        self.calls = 0
+        self.errors = 0
+
+    async def delay(self, median_ms: float) -> None:
+        ms = median_ms * math.exp(self.rnd.gauss(0, self.cfg.sigma)) if self.cfg.sigma > 0 else median_ms
+        await asyncio.sleep(ms / 1000)
+
+    def maybe_error(self) -> JSONResponse | None:
+        self.calls += 1
+        if self.rnd.random() >= self.cfg.error_rate:
+            return None
+        self.errors += 1
+        status = self.rnd.choice(self.cfg.error_status)
+        kind = "rate_limit_exceeded" if status == 429 else "server_error"
+        headers = {"retry-after": "1"} if status == 429 else {}
+        return JSONResponse(status_code=status, headers=headers,
+                            content={"error": {"message": f"mock {kind}", "type": kind, "code": kind}})
+
+    def _sentence(self, n: int = 10) -> str:
+        return " ".join(self.rnd.choice(WORDS) for _ in range(n)).capitalize()
+
+    def _quiz(self, prompt: str) -> str:
+        m = re.search(r"Gere (\d+) itens de prova do tipo: ([^\n]+)", prompt)
+        n = int(m.group(1)) if m else 5
+        desc = m.group(2) if m else ""
+        items = []
+        for _ in range(n):
+            if "Verdadeiro" in desc:
+                items.append({"type": "vf", "question": self._sentence() + "?", "answer": self.rnd.random() < 0.5,
+                              "explain": self._sentence(14)})
+            elif "múltipla" in desc:
+                items.append({"type": "mc", "question": self._sentence() + "?",
+                              "options": [self._sentence(4) for _ in range(4)], "answer": self.rnd.randrange(4),
+                              "explain": self._sentence(14)})
+            else:
+                items.append({"type": "disc", "question": self._sentence(12) + "?",
+                              "rubric": [self._sentence(6) for _ in range(3)]})
+        return "```json\n" + json.dumps(items, ensure_ascii=False) + "\n```"
+
+    def _grades(self, prompt: str) -> str:
+        m = re.search(r"ITENS\+RESPOSTAS \(JSON\):\s*(\[.*?\])\s*SAÍDA", prompt, re.S)
+        try:
+            n = len(json.loads(m.group(1))) if m else 1
+        except ValueError:
+            n = 1
+        return json.dumps({"scores": [round(self.rnd.random(), 2) for _ in range(n)]})
+
+    def _plan(self, prompt: str) -> str:
+        m = re.search(r"(\d+)\s*semanas", prompt)
+        weeks = int(m.group(1)) if m else 4
+        parts = ["# Objetivos de aprendizagem"] + [f"- {self._sentence()}" for _ in range(4)]
+        for w in range(1, weeks + 1):
+            parts += [f"## Semana {w}"] + [f"- {self._sentence(8)}" for _ in range(4)]
+        parts += ["# Estratégias de revisão e avaliação", f"- {self._sentence()}"]
+        return "\n".join(parts)
+
+    def _bullets(self, prompt: str) -> str:
+        m = re.search(r"(?:exatamente|até) (\d+) itens", prompt)
+        n = int(m.group(1)) if m else 5
+        return "\n".join(f"- {self._sentence(8)}." for _ in range(n))
+
+    def reply(self, system: str, prompt: str) -> str:
+        if "avaliações" in system:
+            return self._quiz(prompt)
+        if "corretor" in system:
+            return self._grades(prompt)
+        if "planos de estudo" in system:
+            return self._plan(prompt)
+        if "itens" in prompt:
+            return self._bullets(prompt)
+        return self._sentence(30) + "."
+
+    def embedding(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        v = np.random.default_rng(seed).standard_normal(self.cfg.embed_dim).astype(np.float32)
+        return (v / np.linalg.norm(v)).tolist()
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _split_messages(messages) -> tuple[str, str]:
+    if isinstance(messages, str):
+        return "", messages
+    system = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    user = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")
+    return system, user
+
+
+def create_mock_app(cfg: MockConfig) -> FastAPI:
+    app = FastAPI(title="mock-openai")
+    backend = MockBackend(cfg)
+    app.state.backend = backend
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await backend.delay(cfg.median_ms)
+        if (err := backend.maybe_error()) is not None:
+            return err
+        system, user = _split_messages(body.get("messages", []))
+        text = backend.reply(system, user)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": _tokens(system + user), "completion_tokens": _tokens(text),
+                      "total_tokens": _tokens(system + user) + _tokens(text)},
+        }
+
+    async def responses(request: Request):
+        body = await request.json()
+        await backend.delay(cfg.median_ms)
+        if (err := backend.maybe_error()) is not None:
+            return err
+        system, user = _split_messages(body.get("input", ""))
+        system = body.get("instructions") or system
+        text = backend.reply(system, user)
+        return {
+            "id": f"resp_{uuid.uuid4().hex[:24]}", "object": "response", "created_at": int(time.time()),
+            "status": "completed", "model": body.get("model", "mock"),
+            "output": [{"type": "message", "id": f"msg_{uuid.uuid4().hex[:24]}", "role": "assistant", "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+            "output_text": text,
+            "usage": {"input_tokens": _tokens(system + user), "output_tokens": _tokens(text),
+                      "total_tokens": _tokens(system + user) + _tokens(text)},
+        }
+
+    async def embeddings(request: Request):
+        body = await request.json()
+        await backend.delay(cfg.embed_median_ms)
+        if (err := backend.maybe_error()) is not None:
+            return err
+        inputs = body.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        tokens = sum(_tokens(t) for t in inputs)
+        return {
+            "object": "list", "model": body.get("model", "mock-embedding"),
+            "data": [{"object": "embedding", "index": i, "embedding": backend.embedding(t)} for i, t in enumerate(inputs)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    async def stats():
+        return {"calls": backend.calls, "errors": backend.errors}
+
+    for prefix in ("", "/v1"):
+        app.add_api_route(f"{prefix}/chat/completions", chat_completions, methods=["POST"])
+        app.add_api_route(f"{prefix}/responses", responses, methods=["POST"])
+        app.add_api_route(f"{prefix}/embeddings", embeddings, methods=["POST"])
+    app.add_api_route("/stats", stats, methods=["GET"])
+    return app
+
+
+def main() -> None:
+    import uvicorn
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--median-ms", type=float, default=800)
+    ap.add_argument("--sigma", type=float, default=0.5)
+    ap.add_argument("--embed-median-ms", type=float, default=120)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--error-status", default="500,429")
+    ap.add_argument("--embed-dim", type=int, default=1536)
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args()
+    cfg = MockConfig(
+        median_ms=args.median_ms, sigma=args.sigma, embed_median_ms=args.embed_median_ms,
+        error_rate=args.error_rate, error_status=tuple(int(s) for s in args.error_status.split(",")),
+        embed_dim=args.embed_dim, seed=args.seed,
+    )
+    uvicorn.run(create_mock_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
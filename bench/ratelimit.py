@@ -0,0 +1,58 @@
+"""Micro-benchmark dos backends em memória do rate limiter.
+
+Uso: python -m bench.ratelimit [--keys 20000] [--hits 200000]
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from app.middleware.ratelimit import InMemoryBackend, SlidingLogBackend
+
+
+async def _run(backend, keys: list[str], hits: int, window: int, max_calls: int) -> float:
+    rnd = random.Random(42)
+    seq = [keys[rnd.randrange(len(keys))] for _ in range(hits)]
+    t0 = time.perf_counter()
+    for k in seq:
+        await backend.hit(k, window, max_calls)
+    return time.perf_counter() - t0
+
+
+async def _concurrent(backend, keys: list[str], hits: int, window: int, max_calls: int, tasks: int) -> float:
+    per_task = hits // tasks
+
+    async def worker(seed: int):
+        rnd = random.Random(seed)
+        for _ in range(per_task):
+            await backend.hit(keys[rnd.randrange(len(keys))], window, max_calls)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(tasks)))
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=20000)
+    ap.add_argument("--hits", type=int, default=200000)
+    ap.add_argument("--window", type=int, default=60)
+    ap.add_argument("--max-calls", type=int, default=30)
+    ap.add_argument("--tasks", type=int, default=64)
+    args = ap.parse_args()
+
+    keys = [f"ip:10.{i // 65536}.{i // 256 % 256}.{i % 256}" for i in range(args.keys)]
+    print(f"{args.keys} chaves, {args.hits} chamadas, janela {args.window}s / {args.max_calls} chamadas")
+    print(f"{'backend':<20}{'seq ops/s':>14}{'conc ops/s':>14}{'memória':>14}")
+    for name, factory in (("SlidingLogBackend", SlidingLogBackend), ("InMemoryBackend", InMemoryBackend)):
+        tracemalloc.start()
+        backend = factory()
+        seq = asyncio.run(_run(backend, keys, args.hits, args.window, args.max_calls))
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        conc = asyncio.run(_concurrent(factory(), keys, args.hits, args.window, args.max_calls, args.tasks))
+        print(f"{name:<20}{args.hits / seq:>14,.0f}{args.hits / conc:>14,.0f}{mem / 1024 / 1024:>12.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
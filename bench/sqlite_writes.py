@@ -0,0 +1,105 @@
+"""Vazão de gravações concorrentes no SQLite: padrão, perfil ajustado e escritor único.
+
+Cada "requisição" grava uma tentativa de prova e atualiza quiz_stats, como o
+quiz_submit. Uso: python -m bench.sqlite_writes [--writes 3000] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.db.session import Base, tune_sqlite
+from app.db.writer import BatchWriter
+from app.models import user, document, job  # noqa: F401  (tabelas e relações referenciadas)
+from app.models.tutor import Quiz, QuizAttempt, QuizStat
+from app.tutor.stats import record_attempt
+
+QUIZZES = 50
+
+
+def _setup(path: str) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(Quiz.__table__.insert(), [
+            {"id": i, "document_id": 1, "owner_id": 1, "quiz_type": "vf", "items_json": "[]"}
+            for i in range(1, QUIZZES + 1)
+        ])
+        conn.execute(QuizStat.__table__.insert(), [
+            {"quiz_id": i, "attempts": 0, "score_sum": 0, "best_score": 0} for i in range(1, QUIZZES + 1)
+        ])
+    engine.dispose()
+
+
+def _work(i: int):
+    quiz_id = i % QUIZZES + 1
+
+    async def save(db: AsyncSession) -> None:
+        db.add(QuizAttempt(quiz_id=quiz_id, owner_id=1, answers_json="[true, 1, \"resp\"]",
+                           score=i % 11, max_score=10))
+        await record_attempt(db, quiz_id, i % 11)
+    return save
+
+
+async def _run(label: str, tuned: bool, batched: bool, writes: int, concurrency: int) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    _setup(path)
+    kwargs = {"poolclass": AsyncAdaptedQueuePool, "pool_size": concurrency} if tuned else {}
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", **kwargs)
+    if tuned:
+        tune_sqlite(engine.sync_engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    writer = BatchWriter(sessions, 200, 0.005) if batched else None
+    if writer:
+        writer.start()
+
+    errors = 0
+    pending = iter(range(writes))
+
+    async def client() -> None:
+        nonlocal errors
+        for i in pending:
+            work = _work(i)
+            if writer:
+                writer.submit(work)
+                continue
+            async with sessions() as db:
+                try:
+                    await work(db)
+                    await db.commit()
+                except Exception:
+                    errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    if writer:
+        await writer.stop()
+    elapsed = time.perf_counter() - t0
+
+    async with sessions() as db:
+        stored = await db.scalar(select(func.count()).select_from(QuizAttempt))
+    await engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    print(f"{label:<22}{writes / elapsed:>12.0f}{stored:>10}{errors:>8}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writes", type=int, default=3000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    args = ap.parse_args()
+    print(f"{args.writes} gravações, {args.concurrency} clientes concorrentes")
+    print(f"{'perfil':<22}{'grav/s':>12}{'gravadas':>10}{'erros':>8}")
+    asyncio.run(_run("padrão", False, False, args.writes, args.concurrency))
+    asyncio.run(_run("WAL + pragmas", True, False, args.writes, args.concurrency))
+    asyncio.run(_run("WAL + escritor único", True, True, args.writes, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
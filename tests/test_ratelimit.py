@@ -0,0 +1,116 @@
+import asyncio
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.middleware import ratelimit
+from app.middleware.ratelimit import InMemoryBackend, RateLimitMiddleware, RedisBackend
+
+
+class Clock:
+    """Relógio manual para o InMemoryBackend (time.monotonic)."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", c)
+    return c
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_memory_allows_burst_then_denies(clock):
+    async def go():
+        b = InMemoryBackend()
+        allowed = [await b.hit("k", 10, 3) for _ in range(3)]
+        assert allowed == [(True, 0)] * 3
+        # GCRA: libera uma chamada a cada window/max_calls = 3.33s
+        assert await b.hit("k", 10, 3) == (False, 4)
+        assert (await b.hit("outra", 10, 3))[0]
+    run(go())
+
+
+def test_memory_retry_after_and_window_expiry(clock):
+    async def go():
+        b = InMemoryBackend()
+        for _ in range(3):
+            await b.hit("k", 10, 3)
+        allowed, retry_after = await b.hit("k", 10, 3)
+        assert not allowed
+        clock.now += retry_after
+        assert await b.hit("k", 10, 3) == (True, 0)
+        assert not (await b.hit("k", 10, 3))[0]
+
+        clock.now += 10
+        assert [await b.hit("k", 10, 3) for _ in range(3)] == [(True, 0)] * 3
+        assert not (await b.hit("k", 10, 3))[0]
+    run(go())
+
+
+def test_redis_allows_then_denies():
+    async def go():
+        b = RedisBackend(fakeredis.aioredis.FakeRedis())
+        assert [await b.hit("k", 10, 3) for _ in range(3)] == [(True, 0)] * 3
+        # janela deslizante: libera quando a chamada mais antiga sai da janela
+        allowed, retry_after = await b.hit("k", 10, 3)
+        assert not allowed and retry_after == 10
+        assert (await b.hit("outra", 10, 3))[0]
+        assert await b.client.pttl("rl:k") > 0
+    run(go())
+
+
+def test_redis_window_expiry():
+    async def go():
+        b = RedisBackend(fakeredis.aioredis.FakeRedis())
+        assert [(await b.hit("k", 1, 2))[0] for _ in range(3)] == [True, True, False]
+        await asyncio.sleep(1.05)
+        assert [(await b.hit("k", 1, 2))[0] for _ in range(3)] == [True, True, False]
+    run(go())
+
+
+def test_redis_fails_open():
+    class Down:
+        def register_script(self, _script):
+            async def call(**_kwargs):
+                raise ConnectionError("down")
+            return call
+
+    assert run(RedisBackend(Down()).hit("k", 10, 1)) == (True, 0)
+
+
+@pytest.mark.parametrize("make_backend", [InMemoryBackend, lambda: RedisBackend(fakeredis.aioredis.FakeRedis())],
+                         ids=["memory", "redis"])
+def test_middleware_sets_retry_after(make_backend):
+    async def go():
+        inner = FastAPI()
+
+        @inner.get("/upload/x")
+        def upload():
+            return {"ok": True}
+
+        @inner.get("/livre")
+        def livre():
+            return {"ok": True}
+
+        app = RateLimitMiddleware(inner, window_seconds=60, max_calls=2, key_func=lambda r: "ip:test",
+                                  include_path_prefixes=("/upload",), backend=make_backend())
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as c:
+            codes = [(await c.get("/upload/x")).status_code for _ in range(2)]
+            denied = await c.get("/upload/x")
+            free = await c.get("/livre")
+        assert codes == [200, 200]
+        assert denied.status_code == 429
+        retry_after = int(denied.headers["Retry-After"])
+        assert 1 <= retry_after <= 60
+        assert denied.json()["try_again_in"] == retry_after
+        assert free.status_code == 200
+    run(go())